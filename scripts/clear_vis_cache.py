@@ -4,30 +4,48 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.db.vector_store import VectorStore
 
+# Rows read and updated per Chroma call
+BATCH_SIZE = 1000
+
 def clear_cache():
     vs = VectorStore()
     coll = vs.collection
-    all_data = coll.get()
-    
-    updates = []
-    ids = []
-    
-    if not all_data['ids']:
+
+    ids_batch = []
+    metas_batch = []
+    cleared = 0
+    offset = 0
+
+    while True:
+        page = coll.get(limit=BATCH_SIZE, offset=offset, include=["metadatas"])
+        if not page['ids']:
+            break
+        offset += len(page['ids'])
+
+        for doc_id, meta in zip(page['ids'], page['metadatas']):
+            if meta and ("mindmap_json" in meta or "mermaid_code" in meta):
+                # The page is discarded after this loop, so edit in place
+                meta.pop("mindmap_json", None)
+                meta.pop("mermaid_code", None)
+
+                ids_batch.append(doc_id)
+                metas_batch.append(meta)
+
+            if len(ids_batch) == BATCH_SIZE:
+                coll.update(ids=ids_batch, metadatas=metas_batch)
+                cleared += len(ids_batch)
+                ids_batch, metas_batch = [], []
+
+    if offset == 0:
         print("Database empty.")
         return
 
-    for i, meta in enumerate(all_data['metadatas']):
-        if meta and ("mindmap_json" in meta or "mermaid_code" in meta):
-            new_meta = meta.copy()
-            new_meta.pop("mindmap_json", None)
-            new_meta.pop("mermaid_code", None)
-            
-            updates.append(new_meta)
-            ids.append(all_data['ids'][i])
-            
-    if ids:
-        coll.update(ids=ids, metadatas=updates)
-        print(f"Cleared visualization cache for {len(ids)} papers.")
+    if ids_batch:
+        coll.update(ids=ids_batch, metadatas=metas_batch)
+        cleared += len(ids_batch)
+
+    if cleared:
+        print(f"Cleared visualization cache for {cleared} papers.")
     else:
         print("No cache found to clear.")
 
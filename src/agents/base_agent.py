@@ -0,0 +1,71 @@
+import functools
+import string
+from pathlib import Path
+from typing import Callable
+from src.core import llm_cache
+
+PROMPTS_DIR = Path(__file__).parent / "prompts"
+
+
+@functools.lru_cache(maxsize=32)
+def _read_prompt(path: str) -> str:
+    """Read a prompt file once per process."""
+    return Path(path).read_text(encoding="utf-8").strip()
+
+
+def compile_prompt(template: str) -> Callable[..., str]:
+    """
+    Pre-parse a str.format template into (literal, field) pieces so the
+    format spec is not re-parsed on every render. Templates using format
+    specs, conversions or attribute/index lookups fall back to .format.
+    """
+    parts = []
+    try:
+        for literal, field, spec, conversion in string.Formatter().parse(template):
+            if spec or conversion or (field is not None and not field.isidentifier()):
+                return template.format
+            parts.append((literal, field))
+    except ValueError:
+        return template.format
+
+    def render(**kwargs) -> str:
+        return "".join([
+            literal if field is None else literal + str(kwargs[field])
+            for literal, field in parts
+        ])
+
+    return render
+
+
+class BaseAgent:
+    """
+    Shared setup for LLM-backed agents.
+    Subclasses set `prompt_file` to a file in the prompts directory.
+    """
+    prompt_file: str = ""
+
+    def __init__(self):
+        self.prompt_template = self._load_prompt()
+        self.render_prompt = compile_prompt(self.prompt_template)
+
+    @functools.cached_property
+    def llm(self):
+        # Resolved on first use, so importing a route module that creates
+        # agents doesn't build an LLM client during API startup
+        return self._get_llm()
+
+    def _get_llm(self):
+        from src.core.llm_factory import LLMFactory
+        return LLMFactory.get_llama_index_llm()
+
+    def _load_prompt(self) -> str:
+        prompt_path = PROMPTS_DIR / self.prompt_file
+        return _read_prompt(str(prompt_path))
+
+    def _cache_key(self, *parts: str) -> str:
+        """
+        Key for the LLM output cache. Covers the model, the prompt template
+        (so edits to a prompt invalidate old entries) and the inputs.
+        """
+        model = str(getattr(self.llm, "model", ""))
+        return llm_cache.make_key(type(self).__name__, model, self.prompt_template, *parts)
@@ -1,37 +1,60 @@
-from typing import List, Dict, Any
-from pathlib import Path
+import orjson
+from typing import Iterator, Dict, Any
 from src.core.config import get_settings
+from src.agents.base_agent import BaseAgent
+from src.core import llm_cache
 
 settings = get_settings()
 
-class IdeaGenerationAgent:
-    def __init__(self):
-        self.llm = self._get_llm()
-        
-        # Load prompt from external file
-        prompt_path = Path(__file__).parent / "prompts" / "idea_generation_prompt.txt"
-        with open(prompt_path, "r", encoding="utf-8") as f:
-            self.prompt_template = f.read().strip()
-            
-    def _get_llm(self):
-        from src.core.llm_factory import LLMFactory
-        return LLMFactory.get_llama_index_llm()
+class IdeaGenerationAgent(BaseAgent):
+    prompt_file = "idea_generation_prompt.txt"
 
-    def generate_ideas(self, paper: Dict[str, Any]) -> List[str]:
+    def generate_ideas(self, paper: Dict[str, Any]) -> Iterator[str]:
+        """
+        Yield ideas one line at a time as the LLM streams them.
+        Callers that need a list use list(agent.generate_ideas(paper)).
+        """
         if not self.llm:
-            return ["LLM not configured"]
+            yield "LLM not configured"
+            return
             
         try:
-            metrics_str = str(paper.get("metrics", {}))
-            prompt = self.prompt_template.format(
-                title=paper.get("title", ""),
-                abstract=paper.get("abstract", ""),
+            title = paper.get("title", "")
+            abstract = paper.get("abstract", "")
+            # Compact JSON is fewer prompt tokens than a Python repr
+            metrics_str = orjson.dumps(paper.get("metrics") or {}, default=str).decode()
+
+            key = self._cache_key(title, abstract, metrics_str)
+            cached = llm_cache.cache_get(key)
+            if cached is not None:
+                lines = (line.strip() for line in cached.splitlines())
+                yield from (line for line in lines if line)
+                return
+
+            prompt = self.render_prompt(
+                title=title,
+                abstract=abstract,
                 metrics=metrics_str
             )
-            
-            response = self.llm.complete(prompt)
-            result = response.text
-            return [line.strip() for line in result.split("\n") if line.strip()]
+
+            # Emit each complete line as soon as it arrives
+            text = []
+            buffer = ""
+            for chunk in self.llm.stream_complete(prompt):
+                delta = chunk.delta or ""
+                text.append(delta)
+                buffer += delta
+                while "\n" in buffer:
+                    line, buffer = buffer.split("\n", 1)
+                    line = line.strip()
+                    if line:
+                        yield line
+            line = buffer.strip()
+            if line:
+                yield line
+
+            result = "".join(text)
+            if result.strip():
+                llm_cache.cache_set(key, result)
         except Exception as e:
             print(f"Error generating ideas: {e}")
-            return []
@@ -1,11 +1,70 @@
-import requests
+import time
+import httpx
+import orjson
 import arxiv
-from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Iterator, List, Dict, Any
+from tenacity import (
+    retry,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_exponential,
+)
+
+# Timeouts for HF API calls
+HTTP_TIMEOUT = httpx.Timeout(10.0, connect=3.0)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+ARXIV_MAX_PAGE_SIZE = 100
+HF_DAILY_PAPERS_URL = "https://huggingface.co/api/daily_papers?date={}"
+
+
+@lru_cache(maxsize=1)
+def _today_iso(bucket: int) -> str:
+    """Today's date, recomputed only when the hourly bucket changes."""
+    return date.today().isoformat()
+
+
+def _is_retryable(error: BaseException) -> bool:
+    """Retry on transport errors and on 429/5xx responses."""
+    if isinstance(error, httpx.TransportError):
+        return True
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRY_STATUSES
+    return False
+
 
 class IngestionAgent:
     def __init__(self):
-        self.arxiv_client = arxiv.Client()
+        # One HTTP/2 client shared by the fetch threads; concurrent
+        # requests to the same host are multiplexed over one connection.
+        self.client = httpx.Client(
+            http2=True,
+            timeout=HTTP_TIMEOUT,
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=16)
+        )
+
+    def close(self):
+        """Release pooled HTTP connections."""
+        self.client.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=0.3, max=5),
+        retry=retry_if_exception(_is_retryable),
+        reraise=True
+    )
+    def _get(self, url: str) -> httpx.Response:
+        response = self.client.get(url)
+        response.raise_for_status()
+        return response
 
     def fetch_arxiv_papers(self, query: str, max_results: int = 10) -> List[Dict[str, Any]]:
         """
@@ -16,9 +75,18 @@ class IngestionAgent:
             max_results=max_results,
             sort_by=arxiv.SortCriterion.SubmittedDate
         )
-        
+
+        # Sized to the request so small searches fit in a single page; the
+        # default client sleeps 3s between pages. Built per call because the
+        # client's rate-limit bookkeeping is not safe to share across threads.
+        client = arxiv.Client(
+            page_size=min(max_results, ARXIV_MAX_PAGE_SIZE),
+            delay_seconds=0.5,
+            num_retries=3
+        )
+
         papers = []
-        for result in self.arxiv_client.results(search):
+        for result in client.results(search):
             papers.append({
                 "source": "arxiv",
                 "id": result.entry_id,
@@ -36,13 +104,12 @@ class IngestionAgent:
         Date format: YYYY-MM-DD. Defaults to today.
         """
         if not date:
-            date = datetime.now().strftime("%Y-%m-%d")
+            date = _today_iso(int(time.time()) // 3600)
             
-        url = f"https://huggingface.co/api/daily_papers?date={date}"
+        url = HF_DAILY_PAPERS_URL.format(date)
         try:
-            response = requests.get(url)
-            response.raise_for_status()
-            data = response.json()
+            response = self._get(url)
+            data = orjson.loads(response.content)
             
             papers = []
             for item in data:
@@ -62,19 +129,29 @@ class IngestionAgent:
             print(f"Error fetching HF papers: {e}")
             return []
 
-    def run(self, topics: List[str]) -> List[Dict[str, Any]]:
+    def run(self, topics: List[str]) -> Iterator[Dict[str, Any]]:
         """
         Main execution method to fetch papers for given topics.
+        ArXiv topics and the HF daily feed are fetched concurrently, and
+        papers are yielded as each source completes so downstream agents
+        can start before every fetch has finished.
         """
-        all_papers = []
-        
-        # Fetch from ArXiv
-        for topic in topics:
-            print(f"Fetching ArXiv papers for topic: {topic}")
-            all_papers.extend(self.fetch_arxiv_papers(topic))
+        with ThreadPoolExecutor(max_workers=min(8, len(topics) + 1)) as executor:
+            futures = {}
+            # Fetch from ArXiv
+            for topic in topics:
+                print(f"Fetching ArXiv papers for topic: {topic}")
+                futures[executor.submit(self.fetch_arxiv_papers, topic)] = f"arxiv:{topic}"
+                
+            # Fetch from HF (Last 1 day)
+            print("Fetching HuggingFace Daily Papers")
+            futures[executor.submit(self.fetch_hf_daily_papers)] = "huggingface"
             
-        # Fetch from HF (Last 1 day)
-        print("Fetching HuggingFace Daily Papers")
-        all_papers.extend(self.fetch_hf_daily_papers())
-        
-        return all_papers
+            for future in as_completed(futures):
+                # One failing source should not drop the others
+                try:
+                    papers = future.result()
+                except Exception as e:
+                    print(f"Error fetching {futures[future]}: {e}")
+                    continue
+                yield from papers
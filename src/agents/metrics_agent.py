@@ -1,55 +1,164 @@
-from typing import Dict, Any, List
-from pathlib import Path
+import asyncio
+import logging
+from typing import Dict, Any, Iterable, List, Optional, Tuple, TYPE_CHECKING
 from src.core.config import get_settings
+from src.agents.base_agent import BaseAgent
+from src.core import llm_cache
 from src.api.schemas import PaperMetrics
-from llama_index.core.program import LLMTextCompletionProgram
+from tenacity import (
+    retry,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_exponential,
+)
+
+if TYPE_CHECKING:
+    from llama_index.core.program import LLMTextCompletionProgram
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Papers buffered between a streaming producer and the LLM workers
+PAPER_QUEUE_SIZE = 32
+
+
+def _is_retryable(error: BaseException) -> bool:
+    """Retry on rate limits (429), server errors (5xx) and connection drops."""
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status is not None and (status == 429 or status >= 500)
+
+
+class MetricsAgent(BaseAgent):
+    prompt_file = "metrics_prompt.txt"
 
-class MetricsAgent:
     def __init__(self):
-        self.llm = self._get_llm()
-        
-        # Load prompt from external file
-        prompt_path = Path(__file__).parent / "prompts" / "metrics_prompt.txt"
-        with open(prompt_path, "r", encoding="utf-8") as f:
-            self.prompt_template = f.read().strip()
+        super().__init__()
+        # Built once and shared by every call; acall is safe to run concurrently
+        self.program = self._build_program() if self.llm else None
+
+    def _build_program(self) -> "LLMTextCompletionProgram":
+        # Imported here so loading this module does not pull in llama_index
+        from llama_index.core.program import LLMTextCompletionProgram
+        return LLMTextCompletionProgram.from_defaults(
+            output_cls=PaperMetrics,
+            prompt_template_str=self.prompt_template,
+            llm=self.llm,
+            verbose=False
+        )
 
-    def _get_llm(self):
-        from src.core.llm_factory import LLMFactory
-        return LLMFactory.get_llama_index_llm()
+    def _lookup(self, paper: Dict[str, Any]) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """Output-cache key for a paper and its cached metrics, if any."""
+        key = self._cache_key(paper.get("title", ""), paper.get("abstract", ""))
+        return key, llm_cache.cache_get(key)
+
+    def _store(self, key: str, paper: Dict[str, Any], result: PaperMetrics) -> Dict[str, Any]:
+        metrics = result.dict()
+        logger.debug("Metrics for %r: %s", paper.get("title", ""), metrics)
+        llm_cache.cache_set(key, metrics)
+        return metrics
 
     def extract_metrics(self, paper: Dict[str, Any]) -> Dict[str, Any]:
         """
         Extract metrics and structured data from a paper.
+        Results are cached on disk by (model, prompt, title, abstract).
         """
         if not self.llm:
             return {"error": "No LLM configured"}
-            
+
+        key, cached = self._lookup(paper)
+        if cached is not None:
+            return cached
+
         try:
-            program = LLMTextCompletionProgram.from_defaults(
-                output_cls=PaperMetrics,
-                prompt_template_str=self.prompt_template,
-                llm=self.llm,
-                verbose=True
+            result: PaperMetrics = self.program(
+                title=paper.get("title", ""),
+                abstract=paper.get("abstract", "")
             )
-            
-            result: PaperMetrics = program(
-                title=paper.get("title", ""), 
+            return self._store(key, paper, result)
+        except Exception as e:
+            logger.error(f"Error extracting metrics for {paper.get('title')}: {e}")
+            return {}
+
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=1, max=10),
+        retry=retry_if_exception(_is_retryable),
+        reraise=True
+    )
+    async def _acall_program(self, program: "LLMTextCompletionProgram", **kwargs) -> PaperMetrics:
+        return await program.acall(**kwargs)
+
+    async def _aextract_metrics(self, paper: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Async variant of extract_metrics, retried on 429/5xx.
+        Shares the same output cache as extract_metrics.
+        """
+        if not self.llm:
+            return {"error": "No LLM configured"}
+
+        key, cached = self._lookup(paper)
+        if cached is not None:
+            return cached
+
+        try:
+            result: PaperMetrics = await self._acall_program(
+                self.program,
+                title=paper.get("title", ""),
                 abstract=paper.get("abstract", "")
             )
-            return result.dict()
+            return self._store(key, paper, result)
         except Exception as e:
-            print(f"Error extracting metrics for {paper.get('title')}: {e}")
+            logger.error(f"Error extracting metrics for {paper.get('title')}: {e}")
             return {}
 
-    def run(self, papers: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    async def arun(self, papers: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Enrich papers with metrics from inside a running event loop.
+        Producer/consumer: a producer pulls papers from the (possibly lazy)
+        iterable into a bounded queue while LLM_CONCURRENCY workers enrich
+        them. Results keep the input order.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=PAPER_QUEUE_SIZE)
+        results: Dict[int, Dict[str, Any]] = {}
+        done = object()
+
+        async def produce():
+            iterator = enumerate(papers)
+            try:
+                while True:
+                    # Generators may block on network I/O, so advance them off-loop
+                    item = await asyncio.to_thread(next, iterator, done)
+                    if item is done:
+                        break
+                    await queue.put(item)
+            finally:
+                await queue.put(done)
+
+        async def consume():
+            while True:
+                item = await queue.get()
+                if item is done:
+                    # Pass the sentinel on to the next worker
+                    await queue.put(done)
+                    return
+                index, paper = item
+                paper["metrics"] = await self._aextract_metrics(paper)
+                results[index] = paper
+
+        workers = settings.LLM_CONCURRENCY or 8
+        await asyncio.gather(produce(), *[consume() for _ in range(workers)])
+        return [results[i] for i in sorted(results)]
+
+    def run(self, papers: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
-        Process a list of papers and enrich them with metrics.
+        Process papers and enrich them with metrics.
+        Accepts a list or a generator such as IngestionAgent.run(); papers
+        are processed as they arrive, at most settings.LLM_CONCURRENCY at a time.
+        Must be called from synchronous code (it starts its own event loop);
+        async callers await arun() instead.
         """
-        enriched_papers = []
-        for paper in papers:
-            metrics = self.extract_metrics(paper)
-            paper["metrics"] = metrics
-            enriched_papers.append(paper)
-        return enriched_papers
\ No newline at end of file
+        return asyncio.run(self.arun(papers))
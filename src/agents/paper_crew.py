@@ -1,16 +1,29 @@
-import json
+import atexit
 import logging
+import math
+import mmap
 import os
+import queue
 import re
+import threading
 import time
-from datetime import datetime
-from functools import wraps
+import uuid
+from collections import defaultdict, deque
+from datetime import datetime, timedelta
+from functools import lru_cache, wraps
+from itertools import islice
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 import asyncio
-from src.tools.paper_tools import PaperTool
-from concurrent.futures import ThreadPoolExecutor
+import httpx
+from cachetools import TTLCache
+import msgpack
+import numpy as np
+import orjson
+from concurrent.futures import Future, ThreadPoolExecutor
 from src.tools.rag_tool import PaperRAGTool
+from src.core.retriever import embed_queries
 from crewai import Agent, Crew, LLM, Process, Task
 from tenacity import (
     retry,
@@ -18,25 +31,61 @@ from tenacity import (
     stop_after_attempt,
     wait_exponential,
 )
-from src.db.sql_db import Figures,SessionLocal
+from sqlalchemy import bindparam, func, select
+from sqlalchemy.orm import Session
+from src.db.sql_db import Figures, PaperStructure, SessionLocal
+from src.core.config import get_settings
+
 # ============================================================================
 # LOGGING & MONITORING
 # ============================================================================
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('paper_crew.log'),
-        logging.StreamHandler()
-    ]
-)
-logger = logging.getLogger(__name__)
+def _configure_logging():
+    """
+    Route log records through a queue so callers only pay for a put; a
+    background QueueListener does the file/console I/O. Like basicConfig,
+    this does nothing if the root logger already has handlers.
+    """
+    root = logging.getLogger()
+    if root.handlers:
+        return
+
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    file_handler = RotatingFileHandler('paper_crew.log', maxBytes=10_000_000, backupCount=3)
+    stream_handler = logging.StreamHandler()
+    for handler in (file_handler, stream_handler):
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, file_handler, stream_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel(logging.INFO)
 
-import re
-from typing import Dict
-from sqlalchemy.orm import Session
 
+_configure_logging()
+logger = logging.getLogger(__name__)
+
+# Figure placeholders in LLM answers. STRICT matches the IDs we can look up
+# (alphanumeric, plus "_" as produced by FigureValidator normalization);
+# LOOSE matches anything the model wrote so it can be validated/normalized.
+_FIG_RE_STRICT = re.compile(r"<figure:([a-zA-Z0-9_]+)>")
+_FIG_RE_LOOSE = re.compile(r"<figure:([^>]+)>")
+
+
+# Built once with bound parameters, so every answer reuses the same statement
+# (and its compiled-SQL cache entry) whatever figures it references. Image
+# bytes are served by /api/figures, so only the caption is loaded here.
+_FIGURE_CAPTIONS_STMT = select(
+    Figures.figure_id,
+    Figures.caption,
+    (func.coalesce(func.length(Figures.data), 0) > 0).label("has_data")
+).where(
+    Figures.paper_id == bindparam("paper_id"),
+    Figures.figure_id.in_(bindparam("fig_ids", expanding=True))
+)
 
 def inject_figures(
     answer: str,
@@ -44,7 +93,7 @@ def inject_figures(
     session: Session
 ) -> str:
     """
-    Replace <figure:ID> with image + caption fetched from DB.
+    Replace <figure:ID> with an image link + caption fetched from DB.
 
     Args:
         answer: LLM answer containing <figure:ID>
@@ -55,25 +104,33 @@ def inject_figures(
     Returns:
         Updated answer with figures injected
     """
+    if "<figure:" not in answer:
+        return answer
     logger.info("Injecting figures....")
     # ID can be integer or alphanumeric (e.g., 1, 2a, fig3)
-    pattern = r"<figure:([a-zA-Z0-9]+)>"
+    fig_ids = set(_FIG_RE_STRICT.findall(answer))
+    if not fig_ids:
+        return answer
+
+    # One query for every referenced figure instead of one per match
+    rows = session.execute(
+        _FIGURE_CAPTIONS_STMT, {"paper_id": paper_id, "fig_ids": list(fig_ids)}
+    ).all()
+    figures = {row.figure_id: row for row in rows}
+    base_url = get_settings().API_BASE_URL.rstrip("/")
 
     def replace_fn(match):
         fig_id = match.group(1)
-        logger.info(f"Figure found : {fig_id}")
+        logger.info("Figure found : %s", fig_id)
 
-        figure = session.get(
-            Figures,
-            (fig_id.strip(), paper_id)   # composite PK lookup
-        )
+        figure = figures.get(fig_id)
 
         if not figure:
             return f"\n\n*[Figure {fig_id} not found]*\n\n"
 
         img_md = (
-            f"![Figure {fig_id}](data:image/png;base64,{figure.data})"
-            if figure.data
+            f"![Figure {fig_id}]({base_url}/api/figures/{paper_id}/{fig_id}.png)"
+            if figure.has_data
             else "*[Image unavailable]*"
         )
 
@@ -85,16 +142,47 @@ def inject_figures(
 
         return f"\n\n{img_md}\n\n{caption_md}\n\n"
 
-    return re.sub(pattern, replace_fn, answer)
+    return _FIG_RE_STRICT.sub(replace_fn, answer)
+
+
+def _stream_with_figures(deltas: Iterable[str], paper_id: str) -> Iterator[str]:
+    """
+    Re-chunk streamed answer text so a <figure:ID> tag is never split across
+    chunks, injecting each figure as soon as its tag is complete.
+    """
+    tag = "<figure:"
+    buffer = ""
+    session = SessionLocal()
+    try:
+        for delta in deltas:
+            buffer += delta
+            cut = buffer.rfind("<")
+            tail = buffer[cut:] if cut != -1 else ""
+            # Hold back a trailing tag (or tag prefix) until it is closed
+            if not tail or ">" in tail or not (tail.startswith(tag) or tag.startswith(tail)):
+                cut = len(buffer)
+            ready, buffer = buffer[:cut], buffer[cut:]
+            if ready:
+                yield inject_figures(ready, paper_id, session)
+        if buffer:
+            yield inject_figures(buffer, paper_id, session)
+    finally:
+        session.close()
 
 
 
 
 class MetricsCollector:
     """Track execution metrics for monitoring"""
-    
+
+    MAX_ENTRIES = 10_000
+
     def __init__(self):
-        self.metrics = []
+        # Bounded detail log for save_metrics; running stats cover the full lifetime
+        self.metrics: Deque[Dict] = deque(maxlen=self.MAX_ENTRIES)
+        self._stats: Dict[str, Dict[str, float]] = defaultdict(
+            lambda: {'n': 0, 'sum': 0.0, 'min': math.inf, 'max': -math.inf}
+        )
     
     def log_metric(self, metric_type: str, value: Any, metadata: Dict = None):
         entry = {
@@ -104,45 +192,74 @@ class MetricsCollector:
             'metadata': metadata or {}
         }
         self.metrics.append(entry)
-        logger.info(f"METRIC: {metric_type} = {value}")
+        if isinstance(value, (int, float)):
+            s = self._stats[metric_type]
+            s['n'] += 1
+            s['sum'] += value
+            s['min'] = min(s['min'], value)
+            s['max'] = max(s['max'], value)
+        logger.info("METRIC: %s = %s", metric_type, value)
     
     def get_summary(self) -> Dict:
         """Get metrics summary"""
         if not self.metrics:
             return {}
         
-        execution_times = [m['value'] for m in self.metrics if m['type'] == 'execution_time']
+        s = self._stats.get('execution_time')
+        if not s:
+            return {'total_executions': 0, 'avg_time': 0, 'min_time': 0, 'max_time': 0}
         return {
-            'total_executions': len(execution_times),
-            'avg_time': sum(execution_times) / len(execution_times) if execution_times else 0,
-            'min_time': min(execution_times) if execution_times else 0,
-            'max_time': max(execution_times) if execution_times else 0
+            'total_executions': s['n'],
+            'avg_time': s['sum'] / s['n'],
+            'min_time': s['min'],
+            'max_time': s['max']
         }
     
     def save_metrics(self, filepath: str):
-        with open(filepath, 'w') as f:
-            json.dump({
-                'metrics': self.metrics,
+        with open(filepath, 'wb') as f:
+            f.write(orjson.dumps({
+                'metrics': list(self.metrics),
                 'summary': self.get_summary()
-            }, f, indent=2)
+            }, option=orjson.OPT_INDENT_2))
 
 
 # ============================================================================
 # OLLAMA HEALTH CHECK
 # ============================================================================
 
+# Keep-alive client shared by all health checks
+_OLLAMA_HTTP = httpx.Client(timeout=5.0)
+# base_url -> (monotonic timestamp, model names) from the last /api/tags call
+_TAGS_CACHE: Dict[str, Tuple[float, List[str]]] = {}
+TAGS_CACHE_TTL = 60.0
+
+
 class OllamaHealthCheck:
     """Monitor Ollama server health"""
     
     def __init__(self, base_url: str = "http://localhost:11434"):
         self.base_url = base_url
+
+    def _get_tags(self) -> Optional[List[str]]:
+        """
+        Model names from /api/tags, cached for TAGS_CACHE_TTL seconds.
+        Returns None on a non-200 response; raises on connection errors.
+        """
+        cached = _TAGS_CACHE.get(self.base_url)
+        if cached and time.monotonic() - cached[0] < TAGS_CACHE_TTL:
+            return cached[1]
+
+        response = _OLLAMA_HTTP.get(f"{self.base_url}/api/tags")
+        if response.status_code != 200:
+            return None
+        model_names = [m['name'] for m in response.json().get('models', [])]
+        _TAGS_CACHE[self.base_url] = (time.monotonic(), model_names)
+        return model_names
     
     def check_server(self) -> bool:
         """Check if Ollama server is running"""
         try:
-            import requests
-            response = requests.get(f"{self.base_url}/api/tags", timeout=5)
-            return response.status_code == 200
+            return self._get_tags() is not None
         except Exception as e:
             logger.error(f"❌ Ollama server not reachable: {e}")
             return False
@@ -150,18 +267,15 @@ class OllamaHealthCheck:
     def check_model(self, model_name: str) -> bool:
         """Check if specific model is available"""
         try:
-            import requests
-            response = requests.get(f"{self.base_url}/api/tags", timeout=5)
-            if response.status_code == 200:
-                models = response.json().get('models', [])
-                model_names = [m['name'] for m in models]
-                # Handle both "qwen2.5:3b" and "ollama/qwen2.5:3b" formats
-                clean_name = model_name.replace('ollama/', '')
-                available = clean_name in model_names
-                if not available:
-                    logger.warning(f"⚠️ Model '{model_name}' not found. Available: {model_names}")
-                return available
-            return False
+            model_names = self._get_tags()
+            if model_names is None:
+                return False
+            # Handle both "qwen2.5:3b" and "ollama/qwen2.5:3b" formats
+            clean_name = model_name.replace('ollama/', '')
+            available = clean_name in model_names
+            if not available:
+                logger.warning(f"⚠️ Model '{model_name}' not found. Available: {model_names}")
+            return available
         except Exception as e:
             logger.error(f"❌ Failed to check model: {e}")
             return False
@@ -169,26 +283,49 @@ class OllamaHealthCheck:
     def get_available_models(self) -> List[str]:
         """Get list of available models"""
         try:
-            import requests
-            response = requests.get(f"{self.base_url}/api/tags", timeout=5)
-            if response.status_code == 200:
-                models = response.json().get('models', [])
-                return [m['name'] for m in models]
-            return []
+            return list(self._get_tags() or [])
         except Exception:
             return []
 
+    def preload_model(self, model_name: str, keep_alive: str) -> bool:
+        """
+        Load a model into memory ahead of the first request (an empty
+        /api/generate only loads it) and pin it there for `keep_alive`.
+        """
+        try:
+            response = _OLLAMA_HTTP.post(
+                f"{self.base_url}/api/generate",
+                json={"model": model_name.replace('ollama/', ''), "keep_alive": keep_alive},
+                timeout=120.0
+            )
+            return response.status_code == 200
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to preload model '{model_name}': {e}")
+            return False
+
 
 # ============================================================================
 # CHECKPOINT & RECOVERY
 # ============================================================================
 
 class CheckpointManager:
-    """Manage checkpoints for crash recovery"""
+    """
+    Manage checkpoints for crash recovery.
+
+    The latest checkpoint per (paper_id, stage) is one msgpack file that is
+    replaced atomically, so loading needs no directory scan. Earlier
+    checkpoints are kept in a size-bounded .wal file next to it.
+    """
+
+    WAL_MAX_BYTES = 1_000_000
+    WAL_KEEP_ENTRIES = 50
     
     def __init__(self, checkpoint_dir: str = "./checkpoints"):
         self.checkpoint_dir = Path(checkpoint_dir)
         self.checkpoint_dir.mkdir(exist_ok=True)
+
+    def _path(self, paper_id: str, stage: str, suffix: str) -> Path:
+        return self.checkpoint_dir / f"{paper_id}_{stage}{suffix}"
     
     def save_checkpoint(
         self, 
@@ -205,63 +342,191 @@ class CheckpointManager:
             'status': status,
             'data': data
         }
+        payload = msgpack.packb(checkpoint, default=str)
         
-        filename = f"{paper_id}_{stage}_{int(time.time())}.json"
-        filepath = self.checkpoint_dir / filename
-        
-        with open(filepath, 'w') as f:
-            json.dump(checkpoint, f, indent=2)
+        filepath = self._path(paper_id, stage, ".msgpack")
+        tmp = filepath.with_name(filepath.name + ".tmp")
+        with open(tmp, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp, filepath)
+        self._append_wal(paper_id, stage, payload)
         
         logger.info(f"✓ Checkpoint saved: {filepath}")
         return filepath
+
+    def _append_wal(self, paper_id: str, stage: str, payload: bytes):
+        """Append to the history log, trimming it to the newest entries when it grows too large."""
+        wal = self._path(paper_id, stage, ".wal")
+        with open(wal, 'ab') as f:
+            f.write(payload)
+        
+        if wal.stat().st_size <= self.WAL_MAX_BYTES:
+            return
+        with open(wal, 'rb') as f:
+            entries = deque(msgpack.Unpacker(f, raw=False), maxlen=self.WAL_KEEP_ENTRIES)
+        tmp = wal.with_name(wal.name + ".tmp")
+        with open(tmp, 'wb') as f:
+            for entry in entries:
+                f.write(msgpack.packb(entry, default=str))
+        os.replace(tmp, wal)
     
     def load_last_checkpoint(self, paper_id: str, stage: str) -> Optional[Dict]:
         """Load most recent checkpoint for recovery"""
-        pattern = f"{paper_id}_{stage}_*.json"
-        checkpoints = sorted(self.checkpoint_dir.glob(pattern), reverse=True)
-        
-        if not checkpoints:
+        filepath = self._path(paper_id, stage, ".msgpack")
+        try:
+            checkpoint = msgpack.unpackb(filepath.read_bytes(), raw=False)
+        except FileNotFoundError:
             return None
         
-        with open(checkpoints[0], 'r') as f:
-            checkpoint = json.load(f)
-        
-        logger.info(f"↻ Loaded checkpoint: {checkpoints[0]}")
+        logger.info(f"↻ Loaded checkpoint: {filepath}")
         return checkpoint
     
     def clear_checkpoints(self, paper_id: str):
         """Clear all checkpoints for a paper"""
-        pattern = f"{paper_id}_*.json"
+        pattern = f"{paper_id}_*"
         for cp in self.checkpoint_dir.glob(pattern):
             cp.unlink()
 
 
+# ============================================================================
+# APPEND-ONLY PERSISTENCE
+# ============================================================================
+
+class JsonlStore:
+    """
+    Append-only JSONL file with periodic compaction.
+
+    Writes append one orjson-encoded line (O(1) per write instead of
+    rewriting the whole file). Owners replay records on load and call
+    rewrite() with a consolidated snapshot once needs_compaction is set.
+    """
+
+    def __init__(self, path: Path, compact_every: int = 500):
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.compact_every = compact_every
+        self._writes = 0
+        self._fp = None
+
+    @property
+    def needs_compaction(self) -> bool:
+        return self._writes >= self.compact_every
+
+    def replay(self) -> Iterator[Dict]:
+        """Yield stored records in write order."""
+        if not self.path.exists() or self.path.stat().st_size == 0:
+            return
+        # Map the file instead of buffered reads; lines are sliced straight
+        # out of the mapping and handed to orjson
+        with open(self.path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for line in iter(mm.readline, b""):
+                if not line.strip():
+                    continue
+                try:
+                    yield orjson.loads(line)
+                except orjson.JSONDecodeError:
+                    # Torn write from a crash; skip the partial line
+                    logger.warning(f"Skipping corrupted record in {self.path}")
+
+    def append(self, record: Dict):
+        if self._fp is None:
+            self._fp = open(self.path, 'ab')
+        self._fp.write(orjson.dumps(record) + b"\n")
+        self._fp.flush()
+        self._writes += 1
+
+    def rewrite(self, records: Iterable[Dict]):
+        """Atomically replace the file with the given records."""
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, 'wb') as f:
+            for record in records:
+                f.write(orjson.dumps(record) + b"\n")
+        if self._fp is not None:
+            self._fp.close()
+            self._fp = None
+        os.replace(tmp, self.path)
+        self._writes = 0
+
+
+# ============================================================================
+# TOKEN BUDGETING
+# ============================================================================
+
+@lru_cache(maxsize=1)
+def _get_encoding():
+    """tiktoken encoding used for budgeting; None if it cannot be loaded (e.g. offline)."""
+    try:
+        import tiktoken
+        return tiktoken.encoding_for_model("gpt-4o")
+    except Exception as e:
+        logger.warning(f"tiktoken unavailable, estimating tokens from length: {e}")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    encoding = _get_encoding()
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text))
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to at most max_tokens tokens."""
+    encoding = _get_encoding()
+    if encoding is None:
+        return text[:max_tokens * 4]
+    tokens = encoding.encode(text)
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
+
+
 # ============================================================================
 # MEMORY MANAGEMENT
 # ============================================================================
 
 class PaperMemoryManager:
     """Manage conversation history and context"""
+
+    MAX_CONVERSATIONS = 100
+    # Answer tokens kept in each turn's digest for the stable summary
+    DIGEST_TOKENS = 60
     
-    def __init__(self, memory_file: str = "./memory/conversations.json"):
+    def __init__(self, memory_file: str = "./memory/conversations.jsonl"):
         self.memory_file = Path(memory_file)
-        self.memory_file.parent.mkdir(exist_ok=True)
+        self.store = JsonlStore(self.memory_file)
+        # paper_id -> turns ever appended, so a turn keeps its absolute
+        # number after older ones fall out of the bounded deque
+        self._turns: Dict[str, int] = defaultdict(int)
         self.conversations = self._load_memory()
+        # paper_id -> absolute number of the first turn in its summary
+        self._summary_start: Dict[str, int] = {}
+        # paper_id -> per-turn digests, aligned with self.conversations
+        self._digests: Dict[str, Deque[str]] = {}
     
-    def _load_memory(self) -> Dict:
-        if self.memory_file.exists():
-            try:
-                with open(self.memory_file, 'r') as f:
-                    return json.load(f)
-            except json.JSONDecodeError:
-                logger.warning("Corrupted memory file, starting fresh")
-                return {}
-        return {}
+    def _load_memory(self) -> Dict[str, Deque[Dict]]:
+        conversations: Dict[str, Deque[Dict]] = {}
+        for record in self.store.replay():
+            self._history(conversations, record['paper_id']).append(record['entry'])
+            self._turns[record['paper_id']] += 1
+        return conversations
+
+    @staticmethod
+    def _history(conversations: Dict[str, Deque[Dict]], paper_id: str) -> Deque[Dict]:
+        history = conversations.get(paper_id)
+        if history is None:
+            # Keep last MAX_CONVERSATIONS per paper; older ones drop off on append
+            history = conversations[paper_id] = deque(maxlen=PaperMemoryManager.MAX_CONVERSATIONS)
+        return history
     
     def _save_memory(self):
+        """Rewrite the log from the in-memory history (compaction)."""
         try:
-            with open(self.memory_file, 'w') as f:
-                json.dump(self.conversations, f, indent=2)
+            self.store.rewrite(
+                {'paper_id': pid, 'entry': entry}
+                for pid, convs in self.conversations.items()
+                for entry in convs
+            )
         except Exception as e:
             logger.error(f"Failed to save memory: {e}")
     
@@ -273,93 +538,288 @@ class PaperMemoryManager:
         metadata: Dict = None
     ):
         """Add conversation to memory"""
-        if paper_id not in self.conversations:
-            self.conversations[paper_id] = []
-        
-        # Limit memory size (keep last 100 conversations per paper)
-        if len(self.conversations[paper_id]) > 100:
-            self.conversations[paper_id] = self.conversations[paper_id][-100:]
-        
-        self.conversations[paper_id].append({
+        entry = {
             'timestamp': datetime.now().isoformat(),
             'query': query,
-            'answer': answer[:500],  # Truncate for memory efficiency
+            'answer': truncate_tokens(answer, 500),  # Truncate for memory efficiency
             'metadata': metadata or {}
-        })
+        }
+        self._history(self.conversations, paper_id).append(entry)
+        self._turns[paper_id] += 1
+        if paper_id in self._digests:
+            self._digests[paper_id].append(self._digest(entry))
         
-        self._save_memory()
+        try:
+            self.store.append({'paper_id': paper_id, 'entry': entry})
+        except Exception as e:
+            logger.error(f"Failed to save memory: {e}")
+        if self.store.needs_compaction:
+            self._save_memory()
         logger.info(f"💾 Conversation saved for paper: {paper_id}")
     
-    def get_history(self, paper_id: str, last_n: int = 3) -> str:
-        """Get formatted conversation history (reduced for local models)"""
+    def get_history(self, paper_id: str, last_n: int = 3, max_tokens: int = 400) -> str:
+        """
+        Get formatted conversation history (reduced for local models).
+        Keeps the newest of the last `last_n` turns that fit in `max_tokens`.
+        """
         if paper_id not in self.conversations:
             return ""
         
-        history = self.conversations[paper_id][-last_n:]
+        conversations = self.conversations[paper_id]
         formatted = []
+        budget = max_tokens
         
-        for conv in history:
-            formatted.append(f"Previous Q: {conv['query'][:100]}")
-            formatted.append(f"Previous A: {conv['answer'][:150]}...\n")
+        # Newest first, so the most recent turns survive the budget
+        for conv in islice(reversed(conversations), last_n):
+            turn = f"Previous Q: {conv['query']}\nPrevious A: {conv['answer']}\n"
+            tokens = count_tokens(turn)
+            if tokens > budget:
+                if not formatted:
+                    formatted.append(truncate_tokens(turn, budget))
+                break
+            formatted.append(turn)
+            budget -= tokens
         
+        formatted.reverse()
         return "\n".join(formatted)
 
+    @classmethod
+    def _digest(cls, conv: Dict) -> str:
+        return f"- Q: {conv['query']} | A: {truncate_tokens(conv['answer'], cls.DIGEST_TOKENS)}"
+
+    def _paper_digests(self, paper_id: str) -> Deque[str]:
+        """Digest of every stored turn, built once per paper and then appended to"""
+        digests = self._digests.get(paper_id)
+        if digests is None:
+            digests = self._digests[paper_id] = deque(
+                map(self._digest, self.conversations[paper_id]),
+                maxlen=self.MAX_CONVERSATIONS
+            )
+        return digests
+
+    def get_stable_history(
+        self,
+        paper_id: str,
+        max_tokens: int = 400,
+        latest_tokens: int = 600
+    ) -> Tuple[str, str]:
+        """
+        History split for prompt caching: (summary, latest).
+
+        `summary` holds short digests of the earlier turns and only ever
+        grows at its end, so it stays a byte-stable prompt prefix from turn
+        to turn. When it outgrows `max_tokens` the oldest half is dropped in
+        one step (the only time the prefix changes). `latest` is the newest
+        turn as get_history() formats it, cut to `latest_tokens`, and goes
+        after the summary.
+
+        The summary start is kept as an absolute turn number, so turns
+        falling out of the bounded history don't shift it.
+        """
+        conversations = self.conversations.get(paper_id)
+        if not conversations:
+            return "", ""
+
+        latest = self.get_history(paper_id, last_n=1, max_tokens=latest_tokens)
+
+        digests = list(self._paper_digests(paper_id))[:-1]
+        # Absolute number of the oldest turn still stored
+        first = self._turns[paper_id] - len(conversations)
+        start = max(self._summary_start.get(paper_id, 0), first) - first
+        while start < len(digests) and count_tokens("\n".join(digests[start:])) > max_tokens:
+            start += (len(digests) - start + 1) // 2
+        self._summary_start[paper_id] = first + start
+
+        summary = "\n".join(digests[start:])
+        return (f"Earlier in this conversation:\n{summary}\n" if summary else ""), latest
+
+
+# ============================================================================
+# EMBEDDING BATCHING
+# ============================================================================
+
+class EmbeddingBatcher:
+    """
+    Coalesce query embeddings requested from concurrent threads (e.g. parallel
+    CrewAI tool calls) into one batched embedding call.
+
+    The first caller in a window waits `window` seconds for others to join,
+    then embeds the whole batch and resolves every caller's future.
+    """
+
+    def __init__(self, get_model: Callable[[], Any], window: float = 0.005, max_batch: int = 32):
+        self.get_model = get_model
+        self.window = window
+        self.max_batch = max_batch
+        self._lock = threading.Lock()
+        self._pending: List[Tuple[str, Future]] = []
+
+    def embed(self, text: str) -> List[float]:
+        future: Future = Future()
+        with self._lock:
+            self._pending.append((text, future))
+            leader = len(self._pending) == 1
+        if leader:
+            time.sleep(self.window)
+            with self._lock:
+                batch, self._pending = self._pending, []
+            for i in range(0, len(batch), self.max_batch):
+                self._run(batch[i:i + self.max_batch])
+        return future.result()
+
+    def _run(self, batch: List[Tuple[str, Future]]):
+        try:
+            vectors = self._embed_queries([text for text, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, future), vector in zip(batch, vectors):
+            future.set_result(vector)
+
+    def _embed_queries(self, texts: List[str]) -> List[List[float]]:
+        return embed_queries(self.get_model(), texts)
+
 
 # ============================================================================
 # CACHE MANAGEMENT
 # ============================================================================
 
 class RAGCache:
-    """Cache RAG retrieval results"""
+    """
+    Cache RAG retrieval results.
+
+    Exact `paper_id::query` matches are served directly. Otherwise the query
+    is embedded and compared (cosine similarity) against the cached queries
+    for the same paper, so paraphrased questions hit too.
+
+    Entries live in a TTLCache (size + age bounded) guarded by an RLock, since
+    CrewAI runs tool calls from worker threads; writes are appended to a JSONL
+    log and replayed on startup.
+    """
     
-    def __init__(self, cache_file: str = "./cache/rag_cache.json", max_size: int = 1000):
+    def __init__(
+        self,
+        cache_file: str = "./cache/rag_cache.jsonl",
+        max_size: int = 1000,
+        similarity_threshold: float = 0.85,
+        ttl: int = 86400
+    ):
         self.cache_file = Path(cache_file)
-        self.cache_file.parent.mkdir(exist_ok=True)
+        self.store = JsonlStore(self.cache_file)
         self.max_size = max_size
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        self._lock = threading.RLock()
         self.cache = self._load_cache()
+        self._embed_model = None
+        self._batcher = EmbeddingBatcher(self._get_embed_model)
+        # paper_id -> (cache keys, L2-normalized query embeddings)
+        self._index: Dict[str, Tuple[List[str], np.ndarray]] = {}
+        # Last embedded query, so a miss followed by set() embeds once
+        self._last_embedding: Tuple[Optional[str], Optional[np.ndarray]] = (None, None)
     
-    def _load_cache(self) -> Dict:
-        if self.cache_file.exists():
-            try:
-                with open(self.cache_file, 'r') as f:
-                    return json.load(f)
-            except json.JSONDecodeError:
-                return {}
-        return {}
+    def _load_cache(self) -> TTLCache:
+        # Replay the log; later writes for a key win, expired entries are dropped
+        cache = TTLCache(maxsize=self.max_size, ttl=self.ttl)
+        cutoff = (datetime.now() - timedelta(seconds=self.ttl)).isoformat()
+        for record in self.store.replay():
+            if record['v'].get('timestamp', '') >= cutoff:
+                cache[record['k']] = record['v']
+        return cache
     
     def _save_cache(self):
-        # Limit cache size
-        if len(self.cache) > self.max_size:
-            # Keep most recent entries
-            sorted_items = sorted(
-                self.cache.items(),
-                key=lambda x: x[1].get('timestamp', ''),
-                reverse=True
-            )
-            self.cache = dict(sorted_items[:self.max_size])
-        
+        """Rewrite the log from the live (unexpired) entries (compaction)."""
+        with self._lock:
+            self.cache.expire()
+            try:
+                self.store.rewrite({'k': k, 'v': v} for k, v in list(self.cache.items()))
+            except Exception as e:
+                logger.error(f"Failed to save cache: {e}")
+
+    def _get_embed_model(self):
+        if self._embed_model is None:
+            from src.core.llm_factory import LLMFactory
+            self._embed_model = LLMFactory.get_llama_index_embedding()
+        return self._embed_model
+
+    def _embed(self, query: str) -> Optional[np.ndarray]:
+        """Embed and L2-normalize a query with the retriever's embedding model."""
+        last_query, last_vec = self._last_embedding
+        if query == last_query:
+            return last_vec
         try:
-            with open(self.cache_file, 'w') as f:
-                json.dump(self.cache, f, indent=2)
+            vec = np.asarray(self._batcher.embed(query), dtype=np.float32)
         except Exception as e:
-            logger.error(f"Failed to save cache: {e}")
+            logger.warning(f"Query embedding failed, using exact cache match only: {e}")
+            return None
+        norm = np.linalg.norm(vec)
+        vec = vec / norm if norm else None
+        self._last_embedding = (query, vec)
+        return vec
+
+    def _paper_index(self, paper_id: str) -> Tuple[List[str], np.ndarray]:
+        """Stacked embeddings of the cached queries for one paper (built lazily)."""
+        with self._lock:
+            index = self._index.get(paper_id)
+            if index is None:
+                prefix = f"{paper_id}::"
+                keys, vectors = [], []
+                for key, entry in list(self.cache.items()):
+                    if key.startswith(prefix) and entry.get('embedding'):
+                        keys.append(key)
+                        vectors.append(entry['embedding'])
+                matrix = np.asarray(vectors, dtype=np.float32)
+                index = self._index[paper_id] = (keys, matrix)
+            return index
     
     def get(self, paper_id: str, query: str) -> Optional[str]:
-        """Get cached result"""
+        """Get cached result for this query or a semantically similar one"""
         key = f"{paper_id}::{query}"
-        cached = self.cache.get(key)
+        with self._lock:
+            cached = self.cache.get(key)
         if cached:
             return cached.get('result')
-        return None
+
+        keys, matrix = self._paper_index(paper_id)
+        if not keys:
+            return None
+        # Embed outside the lock so concurrent lookups can share a batch
+        vec = self._embed(query)
+        if vec is None or matrix.shape[1] != vec.shape[0]:
+            return None
+
+        scores = matrix @ vec
+        best = int(np.argmax(scores))
+        if scores[best] < self.similarity_threshold:
+            return None
+        with self._lock:
+            entry = self.cache.get(keys[best])
+            if entry is None:
+                # Evicted or expired since the index was built
+                self._index.pop(paper_id, None)
+                return None
+        logger.info("⚡ Semantic cache hit (%.2f): %.50s", scores[best], query)
+        return entry.get('result')
     
     def set(self, paper_id: str, query: str, result: str):
         """Cache result"""
         key = f"{paper_id}::{query}"
-        self.cache[key] = {
+        vec = self._embed(query)
+        entry = {
             'result': result,
-            'timestamp': datetime.now().isoformat()
+            'timestamp': datetime.now().isoformat(),
+            'embedding': vec.tolist() if vec is not None else None
         }
-        self._save_cache()
+        with self._lock:
+            self.cache[key] = entry
+            self._index.pop(paper_id, None)
+            try:
+                self.store.append({'k': key, 'v': entry})
+            except Exception as e:
+                logger.error(f"Failed to save cache: {e}")
+            if self.store.needs_compaction:
+                self._save_cache()
 
 
 # ============================================================================
@@ -378,8 +838,9 @@ class FigureValidator:
         Validate figure references in text
         Returns: (validated_text, list_of_warnings)
         """
+        if "<figure:" not in text:
+            return text, []
         warnings = []
-        pattern = r'<figure:([^>]+)>'
         
         def replace_fn(match):
             fig_id = match.group(1).strip()
@@ -394,13 +855,14 @@ class FigureValidator:
             
             return f"<figure:{normalized_id}>"  # Return normalized
         
-        validated_text = re.sub(pattern, replace_fn, text)
+        validated_text = _FIG_RE_LOOSE.sub(replace_fn, text)
         return validated_text, warnings
     
     def extract_figure_ids(self, text: str) -> List[str]:
         """Extract all figure IDs from text"""
-        pattern = r'<figure:([^>]+)>'
-        return [fig.strip() for fig in re.findall(pattern, text)]
+        if "<figure:" not in text:
+            return []
+        return [fig.strip() for fig in _FIG_RE_LOOSE.findall(text)]
 
 
 # ============================================================================
@@ -428,22 +890,22 @@ class RobustRAGTool():
         # Check cache first
         cached = self.cache.get(paper_id, query)
         if cached:
-            logger.info(f"⚡ Cache hit for query: {query[:50]}")
+            logger.info("⚡ Cache hit for query: %.50s", query)
             return cached
         
         # Check if query already executed
         if query in self.query_history:
-            logger.warning(f"⚠️ Duplicate query detected: {query[:50]}")
+            logger.warning("⚠️ Duplicate query detected: %.50s", query)
             return "Already searched this query. No new information."
         
         # Call actual tool
         try:
-            logger.info(f"🔍 RAG search: {query[:50]}")
+            logger.info("🔍 RAG search: %.50s", query)
             start = time.time()
             result = self.base_tool._run(query)
             duration = time.time() - start
             
-            logger.info(f"✓ RAG completed in {duration:.2f}s")
+            logger.info("✓ RAG completed in %.2fs", duration)
             
             # Track query
             self.query_history.add(query)
@@ -456,11 +918,207 @@ class RobustRAGTool():
             logger.error(f"❌ RAG tool failed: {str(e)}")
             raise
     
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=1, max=5),
+        retry=retry_if_exception_type((ConnectionError, TimeoutError))
+    )
+    def search_batch(self, queries: List[str]) -> List[str]:
+        """
+        search() for several queries: cached ones are served from the cache,
+        the rest share a single batched retrieval (one embedding request).
+        """
+        paper_id = self.base_tool.paper_id
+        # Concurrent lookups so the cache's EmbeddingBatcher coalesces them
+        results = list(_RETRIEVAL_POOL.map(lambda q: self.cache.get(paper_id, q), queries))
+        misses = [i for i, cached in enumerate(results) if not cached]
+        if len(misses) < len(queries):
+            logger.info("⚡ Cache hit for %d/%d queries", len(queries) - len(misses), len(queries))
+        if not misses:
+            return results
+
+        try:
+            logger.info("🔍 RAG batch search: %d queries", len(misses))
+            start = time.time()
+            fresh = self.base_tool.run_batch([queries[i] for i in misses])
+            logger.info("✓ RAG batch completed in %.2fs", time.time() - start)
+        except Exception as e:
+            logger.error(f"❌ RAG tool failed: {str(e)}")
+            raise
+
+        for i, result in zip(misses, fresh):
+            results[i] = result
+            self.query_history.add(queries[i])
+        list(_RETRIEVAL_POOL.map(
+            lambda i: self.cache.set(paper_id, queries[i], results[i]), misses
+        ))
+        return results
+    
     def reset_history(self):
         """Reset query history for new session"""
         self.query_history.clear()
 
 
+# ============================================================================
+# PROMPTS
+# ============================================================================
+
+# Static part of the planner task; the outline comes from the paper prefix
+_PLANNER_INSTRUCTIONS = """You are a research planning agent.
+
+Your task is to create a structured search plan based on the user’s question
+specifically with respect to paper.
+
+Steps you MUST follow:
+1. First determine whether the question refers to the research paper.
+2. If yes, use the paper outline above to identify which sections are relevant to the question.
+3. Break the question into 1–2 focused sub-questions, each mapped to a specific paper section.
+4. Output ONLY the sub-questions as a numbered list, one per line.
+
+Rules:
+- Do NOT answer the question.
+- Do NOT invent paper structure.
+- All sub-questions must be grounded in the paper outline.
+- Each sub-question must be specific and searchable."""
+
+# paper_id -> outline; outlines never change once a paper is ingested
+_OUTLINE_CACHE: Dict[str, str] = {}
+
+
+def _load_outline(paper_id: str) -> Optional[str]:
+    """Paper outline from the DB, cached per paper after the first hit."""
+    outline = _OUTLINE_CACHE.get(paper_id)
+    if outline is None:
+        with SessionLocal() as session:
+            structure = session.get(PaperStructure, paper_id)
+        if structure is None or not structure.outline:
+            return None  # not ingested yet; look again next time
+        outline = _OUTLINE_CACHE[paper_id] = structure.outline
+    return outline
+
+
+def _build_static_prefix(
+    paper_id: str,
+    paper_title: str,
+    paper_outline: Optional[str] = None
+) -> str:
+    """
+    Paper context that opens every agent backstory and task description of a
+    crew run. It is byte-identical across agents and turns, so Ollama can
+    reuse the KV cache for it; per-request text must come after it.
+    """
+    parts = [f"Paper: {paper_title}", f"Paper ID: {paper_id}"]
+    if paper_outline:
+        parts.append(f"Paper outline:\n{paper_outline}")
+    return "\n".join(parts) + "\n\n"
+
+
+def _build_plan_description(
+    user_query: str,
+    static_prefix: str,
+    chat_history: Optional[str] = None
+) -> str:
+    parts = [static_prefix + _PLANNER_INSTRUCTIONS, ""]
+    if chat_history:
+        parts += [f"Context/History:\n{chat_history}", ""]
+    parts.append(f"Question: {user_query}")
+    return "\n".join(parts)
+
+
+# Per-role generation caps (LiteLLM max_tokens maps to Ollama num_predict).
+# The planner only emits a short list; the answer gets the most room.
+PLANNER_LLM_OPTIONS = {"max_tokens": 256, "top_p": 0.9}
+ANSWER_LLM_OPTIONS = {"max_tokens": 1024, "top_p": 0.9}
+# The verdict JSON carries the final answer in "response", so it needs more than a list
+VALIDATOR_MAX_TOKENS = 512
+
+# Questions that need decomposition; anything else short enough skips the crew
+_COMPLEX_QUERY_RE = re.compile(
+    r"\b(compare|comparison|contrast|versus|vs\.?|why|how (?:does|do|is|are)|"
+    r"differ\w*|relat\w*|trade-?offs?|pros and cons|advantages?|limitations?|"
+    r"explain|analy[sz]e|and how|and why)\b",
+    re.IGNORECASE
+)
+SIMPLE_QUERY_MAX_WORDS = 15
+
+_ANSWER_INSTRUCTIONS = """Answer the question using ONLY the retrieved evidence from the paper.
+
+Format in Markdown. Cite sources ("According to Section X...") and add
+<figure:N> placeholders where the evidence mentions figures.
+If the evidence does not contain the answer, say so clearly."""
+
+
+# Cheap check run on partial drafts while the answer is still being generated
+_COVERAGE_CHECK_INSTRUCTIONS = """You check a partial draft answer against the retrieved evidence.
+Respond with a JSON object: {"supported": true|false, "issue": "<short reason or empty>"}.
+Use false only if the draft states something the evidence contradicts or does not contain."""
+
+# Full validation, run only when a coverage check failed
+_VALIDATOR_INSTRUCTIONS = """Review the answer against the question and the retrieved evidence.
+Respond with a JSON object with keys: status (complete|incomplete|needs_revision),
+issues (list), response (the corrected final answer in markdown; the original if it is fine)."""
+
+SPECULATIVE_CHECK_TOKENS = 200
+
+# Signs of a well-formed answer: Markdown headings and grounded references
+_HEADING_RE = re.compile(r"^#{2,}\s", re.MULTILINE)
+_CITATION_RE = re.compile(r"<figure:[^>]+>|\bSection\s+\d+(?:\.\d+)*", re.IGNORECASE)
+STRUCTURAL_MIN_CHARS = 200
+
+
+def _structural_ok(answer: str) -> bool:
+    """Whether a draft is well-formed enough to skip the validator"""
+    return (
+        len(answer) > STRUCTURAL_MIN_CHARS
+        and _HEADING_RE.search(answer) is not None
+        and _CITATION_RE.search(answer) is not None
+    )
+
+
+def _is_complex_query(user_query: str) -> bool:
+    """Whether a question needs the planner/synthesizer/validator flow"""
+    return (
+        len(user_query.split()) >= SIMPLE_QUERY_MAX_WORDS
+        or _COMPLEX_QUERY_RE.search(user_query) is not None
+    )
+
+
+def _build_answer_prompt(
+    static_prefix: str,
+    user_query: str,
+    evidence: str,
+    chat_history: Optional[str] = None
+) -> str:
+    parts = [static_prefix + _ANSWER_INSTRUCTIONS, "", f"Retrieved evidence:\n{evidence}", ""]
+    if chat_history:
+        parts += [f"Context/History:\n{chat_history}", ""]
+    parts.append(f"Question: {user_query}")
+    return "\n".join(parts)
+
+
+# Planner output lines like "1. ...", "2) ...", "- ..." or "* ..."
+_PLAN_ITEM_RE = re.compile(r"^\s*(?:\d+[.)]|[-*•])\s+(.+?)\s*$", re.MULTILINE)
+MAX_SUB_QUERIES = 5
+
+# Shared by all crews; sized to what OLLAMA_NUM_PARALLEL typically allows
+_RETRIEVAL_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="paper-search")
+# Background retrieval started before planning; separate from _RETRIEVAL_POOL
+# because its tasks go on to submit work there
+_PREFETCH_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="paper-prefetch")
+
+
+def _parse_sub_queries(plan: str, limit: int = MAX_SUB_QUERIES) -> List[str]:
+    """Distinct search queries from the planner's numbered/bulleted list"""
+    queries: List[str] = []
+    for match in _PLAN_ITEM_RE.finditer(plan):
+        query = match.group(1).replace("**", "").strip("_`\"' ")
+        if query and query not in queries:
+            queries.append(query)
+            if len(queries) == limit:
+                break
+    return queries
+
+
 # ============================================================================
 # PRODUCTION PAPER CREW - OLLAMA OPTIMIZED
 # ============================================================================
@@ -477,7 +1135,6 @@ class ProductionPaperCrew:
         enable_recovery: bool = True,
         enable_thinking: bool = False  # Disable for speed
     ):
-        from src.core.config import get_settings
         settings = get_settings()
         
         self.ollama_base_url = ollama_base_url or settings.OLLAMA_BASE_URL
@@ -488,17 +1145,31 @@ class ProductionPaperCrew:
         self.memory_mgr = PaperMemoryManager()
         self.metrics = MetricsCollector()
         self.cache = RAGCache()
+        # Final answers, matched on paraphrase with a stricter threshold than RAG results
+        self.answer_cache = RAGCache(
+            cache_file="./cache/answer_cache.jsonl",
+            similarity_threshold=0.92
+        )
         self.enable_recovery = enable_recovery
+        self._llms: Optional[Tuple[LLM, LLM]] = None
+        self._checker_llm: Optional[LLM] = None
+        # Per-thread flag: the crew is shared, recovery state is per request
+        self._in_recovery = threading.local()
         
         # Health check
-        from src.core.config import get_settings
-        settings = get_settings()
         if settings.LLM_PROVIDER == "ollama":
-            self.health_checker = OllamaHealthCheck(ollama_base_url)
+            self.health_checker = OllamaHealthCheck(self.ollama_base_url)
             self._verify_ollama()
     
     def _verify_ollama(self):
-        """Verify Ollama is running and models are available"""
+        """
+        Verify Ollama is running and models are available.
+
+        The retrieval phase issues up to MAX_SUB_QUERIES embedding requests at
+        once; start the server with OLLAMA_NUM_PARALLEL >= 4 so they are
+        served concurrently instead of queueing, and OLLAMA_MAX_LOADED_MODELS=2
+        so the small and large model can stay loaded side by side.
+        """
         logger.info("🔍 Checking Ollama server...")
         
         if not self.health_checker.check_server():
@@ -513,32 +1184,62 @@ class ProductionPaperCrew:
         available = self.health_checker.get_available_models()
         logger.info(f"Available models: {available}")
         
-        # Verify required models
-        for model in [self.small_model, self.large_model]:
+        # Verify required models and keep them resident, so the first
+        # planner/synthesizer calls don't pay the model load (or a swap
+        # between the two; needs OLLAMA_MAX_LOADED_MODELS >= 2)
+        keep_alive = get_settings().OLLAMA_KEEP_ALIVE
+        for model in dict.fromkeys([self.small_model, self.large_model]):
             clean_model = model.replace('ollama/', '')
             if clean_model not in available:
                 logger.warning(
                     f"⚠️ Model '{model}' not found. Pulling model...\n"
                     f"Run: `ollama pull {clean_model}`"
                 )
+            elif self.health_checker.preload_model(clean_model, keep_alive):
+                logger.info(f"✓ Model loaded: {clean_model}")
     
+    def _stable_history_prefix(self, paper_id: str) -> str:
+        """
+        Stored conversation as an append-only summary followed by the newest
+        turn, so consecutive turns share a prompt prefix (unlike a sliding
+        window of raw turns, which changes it every time).
+        """
+        summary, latest = self.memory_mgr.get_stable_history(paper_id)
+        return summary + latest
+
     def _create_llms(self) -> Tuple[LLM, LLM]:
-        """Create LLM instances via Factory"""
+        """Create LLM instances via Factory (once per crew)"""
+        if self._llms is not None:
+            return self._llms
         try:
             from src.core.llm_factory import LLMFactory
             
             # Small model
-            small_llm = LLMFactory.get_crew_llm(self.small_model)
+            small_llm = LLMFactory.get_crew_llm(self.small_model, **PLANNER_LLM_OPTIONS)
             
             # Large model
-            large_llm = LLMFactory.get_crew_llm(self.large_model)
+            large_llm = LLMFactory.get_crew_llm(self.large_model, **ANSWER_LLM_OPTIONS)
             
             logger.info(f"✓ LLMs created: {self.small_model} (retrieval), {self.large_model} (analysis)")
-            return small_llm, large_llm
+            self._llms = (small_llm, large_llm)
+            return self._llms
             
         except Exception as e:
             logger.error(f"❌ Failed to create LLMs: {e}")
             raise
+
+    def _create_validator_llm(self) -> LLM:
+        """
+        Large model constrained to JSON output (Ollama `format: json`) and a
+        short token budget: the validator only emits a verdict object.
+        """
+        from src.core.llm_factory import LLMFactory
+        return LLMFactory.get_crew_llm(
+            self.large_model,
+            response_format={"type": "json_object"},
+            max_tokens=VALIDATOR_MAX_TOKENS,
+            top_p=0.9
+        )
             
 
     
@@ -680,123 +1381,86 @@ class ProductionPaperCrew:
         
 #         return [retrieve_task, analyze_task]
 
-    def _create_improved_flow(
+    def _create_planning_flow(
         self,
-        paper_id: str,
-        paper_title: str,
+        static_prefix: str,
         user_query: str,
-        rag_tool,
         small_llm: LLM,
-        large_llm: LLM
-    ) -> Tuple[List[Agent], List[Task]]:
+        chat_history: Optional[str] = None
+    ) -> Tuple[Agent, Task]:
+        """Planner agent/task; its numbered output drives the retrieval fan-out"""
 
-        # Agent 1: Query Decomposer
         planner = Agent(
             role="Research Query Planner",
             goal="Break down complex questions into searchable sub-queries",
-            backstory="""You analyze questions and create a search strategy within the paper.
+            backstory=static_prefix + """You analyze questions and create a search strategy within the paper.
             Output a numbered list of specific searches needed.""",
             llm=small_llm,
             verbose=True,
             memory=False,
-            tools=[PaperTool()]
-            
+            max_iter=1  # no tools; one pass produces the plan
         )
 
-        # Agent 2: Retriever (with tool)
-        retriever = Agent(
-            role="Paper Searcher",
-            goal="Execute searches and retrieve evidence",
-            backstory="""You use paper_search tool to find specific information.
-            You search multiple times as needed to gather complete evidence.""",
-            tools=[rag_tool],
-            llm=small_llm,
-            verbose=True,
-            memory=True,  # Remember what was already searched
-            max_iter=15
+        plan_task = Task(
+            description=_build_plan_description(user_query, static_prefix, chat_history),
+            agent=planner,
+            expected_output="Numbered list of search queries"
         )
+        return planner, plan_task
+
+    def _run_retrieval_phase(self, rag_tool: RobustRAGTool, sub_queries: List[str]) -> str:
+        """
+        Run every planned sub-query in one batch instead of through a
+        sequential retriever agent: one embedding request for all queries,
+        no per-query LLM turn. Output keeps the retriever task's old layout.
+        """
+        results = rag_tool.search_batch(sub_queries)
+        return "\n\n".join(
+            f"## Query {i}: {query}\n**Results**: {result}"
+            for i, (query, result) in enumerate(zip(sub_queries, results), 1)
+        )
+
+    def _create_improved_flow(
+        self,
+        static_prefix: str,
+        user_query: str,
+        evidence: str,
+        rag_tool,
+        large_llm: LLM
+    ) -> Tuple[List[Agent], List[Task]]:
+        """Synthesizer and validator, fed the pre-fetched evidence"""
 
         # Agent 3: Synthesizer (ALSO has tool for follow-up)
         synthesizer = Agent(
             role="Research Synthesizer",
             goal="Write comprehensive answers with evidence",
-            backstory="""You synthesize information into clear answers.
+            backstory=static_prefix + """You synthesize information into clear answers.
             If you find gaps while writing, you can search for additional details.
             You cite sources and use <figure:X> tags appropriately.""",
             tools=[rag_tool],  # ⭐ Give analyst the tool too!
             llm=large_llm,
             verbose=True,
             memory=True,
-            max_iter=10
+            max_iter=2  # evidence is pre-fetched; allow one follow-up search
         )
 
         # Agent 4: Quality Checker
         validator = Agent(
             role="Quality Validator",
             goal="Verify answer completeness and accuracy",
-            backstory="""You check if answers are complete and well-supported.
+            backstory=static_prefix + """You check if answers are complete and well-supported.
             If critical information is missing, you can trigger additional searches.""",
-            tools=[rag_tool],  # ⭐ Validator can also search!
-            llm=large_llm,
+            # Full-fidelity chunks: the validator checks claims word for word
+            tools=[PaperRAGTool(rag_tool.paper_id, run_id=rag_tool.run_id, uncompressed=True)],
+            llm=self._create_validator_llm(),
             verbose=True,
             memory=True,
-            max_iter=5
-        )
-
-        # Tasks with proper flow
-        plan_task = Task(
-            description=f"""
-    Question: {user_query}
-    Paper: {paper_title}
-    Paper ID: {paper_id}
-You are a research planning agent.
-
-Your task is to create a structured search plan based on the user’s question
-specifically with respect to paper.
-
-Steps you MUST follow:
-1. First determine whether the question refers to the research paper.
-2. If yes, call the `paper_outline` tool to obtain the high-level structure of the paper.
-3. Use the paper outline to identify which sections are relevant to the question.
-4. Break the question into 1–2 focused sub-questions, each mapped to a specific paper section.
-5. Output the plan as a list of sub-questions.
-
-Rules:
-- Do NOT answer the question.
-- Do NOT invent paper structure.
-- All sub-questions must be grounded in the paper outline.
-- Each sub-question must be specific and searchable.    """,
-            agent=planner,
-            expected_output="Numbered list of search queries"
-        )
-
-        retrieve_task = Task(
-            description="""
-    Execute the search plan from the previous task.
-
-    For each planned query:
-    1. Use paper_search tool with the exact query
-    2. Record what you found
-    3. Note if anything is missing
-
-    Compile all search results into a structured format:
-    ## Query 1: [query]
-    **Results**: [what you found]
-
-    ## Query 2: [query]
-    **Results**: [what you found]
-    ...
-    """,
-            agent=retriever,
-            context=[plan_task],
-            expected_output="Structured compilation of all search results"
+            max_iter=3
         )
 
         synthesize_task = Task(
-            description=f"""
-    Question: {user_query}
-
-    Using the retrieved evidence, write a comprehensive answer.
+            description=static_prefix + f"""
+    Using the retrieved evidence, write a comprehensive answer to the question below.
 
     IMPORTANT: If while writing you realize you need more details:
     - Use paper_search to get that specific information
@@ -809,14 +1473,18 @@ Rules:
     - Technical accuracy
 
     If information is genuinely missing, state it clearly.
+
+    Retrieved evidence:
+    {evidence}
+
+    Question: {user_query}
     """,
             agent=synthesizer,
-            context=[retrieve_task],
             expected_output="Complete Markdown answer with citations and figure tags"
         )
 
         validate_task = Task(
-            description="""
+            description=static_prefix + """
     Review the answer against the original question.
 
     Check:
@@ -829,35 +1497,287 @@ Rules:
     - Use paper_search to verify specific claims
     - Use paper_search to fill in missing information
 
-    STRICTLY provide response in following JSON:
-    {
-      "status": "complete|incomplete|needs_revision",
-      "coverage_score": 0-10,
-      "issues": ["list", "of", "issues"],
-      "missing_info": ["what's missing"],
-      "recommendation": "accept|request_more_retrieval",
-      "response": final answer in markdown.
-
-    }
+    Respond with a JSON object with keys: status (complete|incomplete|needs_revision),
+    coverage_score (0-10), issues (list), missing_info (list),
+    recommendation (accept|request_more_retrieval), response (final answer in markdown).
     """,
             agent=validator,
             context=[synthesize_task],
             expected_output="Quality assessment JSON"
         )
 
-        return (
-            [planner, retriever, synthesizer, validator],
-            [plan_task, retrieve_task, synthesize_task, validate_task]
+        return [synthesizer, validator], [synthesize_task, validate_task]
+
+    @staticmethod
+    def _create_crew(agents: List[Agent], tasks: List[Task]) -> Crew:
+        return Crew(
+            agents=agents,
+            tasks=tasks,
+            process=Process.sequential,
+            verbose=True,
+            memory=False,
+            embedder={
+                "provider": "ollama",
+                "config": {
+                    "model_name": "nomic-embed-text:v1.5",  # or "nomic-embed-text"
+                    # Default Ollama URL
+                }
+            },
+            cache=True,
+            planning=False,  # Disable manager mode for speed
+            max_rpm=None,  # No rate limit for local
+            full_output=True
+        )
+
+    def _fast_path(
+        self,
+        static_prefix: str,
+        user_query: str,
+        chat_history: Optional[str],
+        rag_tool: RobustRAGTool,
+        llm: LLM
+    ) -> str:
+        """One retrieval and one LLM call; no planner or validator"""
+        evidence = rag_tool.search(user_query)
+        return str(llm.call(
+            _build_answer_prompt(static_prefix, user_query, evidence, chat_history)
+        ))
+
+    def _plan_and_retrieve(
+        self,
+        paper_id: str,
+        static_prefix: str,
+        user_query: str,
+        chat_history: Optional[str],
+        rag_tool: RobustRAGTool,
+        small_llm: LLM,
+        fast_path: bool = True
+    ) -> Tuple[str, List[Dict[str, str]]]:
+        """
+        Plan sub-queries, then run them as one batched retrieval. With
+        fast_path the plan is a single direct chat call; otherwise it is a
+        CrewAI planner agent. Either way the outline is already in the prefix.
+
+        Returns (evidence, plan_turns); plan_turns is the planner's
+        user/assistant exchange for the direct call (empty for the crew).
+        """
+        # Retrieval for the question as asked runs while the planner generates;
+        # PaperRAGTool memoizes it, so the retrieval phase picks it up for free
+        prefetch = _PREFETCH_POOL.submit(rag_tool.base_tool._run, user_query)
+
+        plan_turns: List[Dict[str, str]] = []
+        if fast_path:
+            plan_request = {
+                "role": "user",
+                "content": _build_plan_description(user_query, "", chat_history)
+            }
+            plan = str(small_llm.call([
+                {"role": "system", "content": static_prefix}, plan_request
+            ]))
+            plan_turns = [plan_request, {"role": "assistant", "content": plan}]
+        else:
+            planner, plan_task = self._create_planning_flow(
+                static_prefix, user_query, small_llm,
+                chat_history=chat_history
+            )
+            self._create_crew([planner], [plan_task]).kickoff()
+            plan = plan_task.output.raw
+
+        # Retrieve: fan the sub-queries out in parallel, bypassing CrewAI
+        planned = [q for q in _parse_sub_queries(str(plan)) if q != user_query]
+        sub_queries = [user_query] + planned[:MAX_SUB_QUERIES - 1]
+        try:
+            prefetch.result()
+        except Exception as e:
+            logger.warning(f"⚠️ Prefetch failed, retrying in retrieval phase: {e}")
+        return self._run_retrieval_phase(rag_tool, sub_queries), plan_turns
+
+    def _answer_messages(
+        self,
+        static_prefix: str,
+        user_query: str,
+        evidence: str,
+        chat_history: Optional[str],
+        plan_turns: List[Dict[str, str]]
+    ) -> List[Dict[str, str]]:
+        """
+        Chat messages for the answer call. When one model serves both roles
+        the answer continues the planner's conversation, so the server
+        reuses the already-prefilled prefix + plan instead of prefilling a
+        fresh prompt (history is then already in the planner turn).
+        """
+        messages = [{"role": "system", "content": static_prefix}]
+        if plan_turns and self.small_model == self.large_model:
+            messages += plan_turns
+            chat_history = None
+        messages.append({
+            "role": "user",
+            "content": _build_answer_prompt("", user_query, evidence, chat_history)
+        })
+        return messages
+
+    def _stream_answer(self, messages: List[Dict[str, str]]) -> Iterator[str]:
+        """
+        Stream the large model's reply to chat messages, delta by delta, with
+        the same temperature, token cap and context window as the crew's
+        answer LLM
+        """
+        from src.core.llm_factory import LLMFactory
+
+        return LLMFactory.stream_crew_llm(self.large_model, messages, **ANSWER_LLM_OPTIONS)
+
+    def _check_coverage(self, static_prefix: str, evidence: str, draft: str) -> bool:
+        """Small-model check that a (partial) draft is backed by the evidence"""
+        if self._checker_llm is None:
+            from src.core.llm_factory import LLMFactory
+            self._checker_llm = LLMFactory.get_crew_llm(
+                self.small_model,
+                response_format={"type": "json_object"},
+                max_tokens=64
+            )
+        try:
+            verdict = orjson.loads(self._checker_llm.call([
+                {"role": "system", "content": static_prefix},
+                {"role": "user", "content": (
+                    f"{_COVERAGE_CHECK_INSTRUCTIONS}\n\nRetrieved evidence:\n{evidence}\n\nDraft:\n{draft}"
+                )}
+            ]))
+        except Exception as e:
+            logger.warning(f"⚠️ Coverage check failed to run: {e}")
+            return False
+        if not verdict.get('supported', False):
+            logger.info("Coverage check flagged draft: %s", verdict.get('issue', ''))
+            return False
+        return True
+
+    @staticmethod
+    def _apply_verdict(verdict_json: str, answer: str) -> str:
+        """The validator's revised answer if it asked for one, else the draft"""
+        try:
+            verdict = orjson.loads(verdict_json)
+        except orjson.JSONDecodeError as e:
+            logger.warning(f"⚠️ Unreadable validator verdict, keeping draft: {e}")
+            return answer
+        if not isinstance(verdict, dict):
+            return answer
+        revised = verdict.get('response')
+        if verdict.get('status') != 'complete' and isinstance(revised, str) and revised.strip():
+            logger.info("Validator revised answer: %s", verdict.get('issues', []))
+            return revised
+        return answer
+
+    def _validate(self, static_prefix: str, user_query: str, evidence: str, answer: str) -> str:
+        """Full large-model validation; returns the (possibly revised) answer"""
+        try:
+            verdict_json = self._create_validator_llm().call([
+                {"role": "system", "content": static_prefix},
+                {"role": "user", "content": (
+                    f"{_VALIDATOR_INSTRUCTIONS}\n\nRetrieved evidence:\n{evidence}\n\n"
+                    f"Question: {user_query}\n\nAnswer:\n{answer}"
+                )}
+            ])
+        except Exception as e:
+            logger.warning(f"⚠️ Validation failed, keeping draft: {e}")
+            return answer
+        return self._apply_verdict(verdict_json, answer)
+
+    def _execute_fast(
+        self,
+        paper_id: str,
+        static_prefix: str,
+        user_query: str,
+        chat_history: Optional[str],
+        rag_tool: RobustRAGTool,
+        small_llm: LLM
+    ) -> str:
+        """
+        Hot path without CrewAI orchestration: direct planner call, batched
+        retrieval, one streamed synthesis call.
+
+        Validation is speculative: every SPECULATIVE_CHECK_TOKENS of the
+        draft, a small-model coverage check starts in the background while
+        generation continues. Once the draft is complete only the checks that
+        have already finished are consulted, plus one final check over the
+        whole draft unless the last finished one already covered it. Only if
+        a check fails does the full large-model validator run.
+        """
+        evidence, plan_turns = self._plan_and_retrieve(
+            paper_id, static_prefix, user_query, chat_history, rag_tool, small_llm
         )
+        messages = self._answer_messages(static_prefix, user_query, evidence, chat_history, plan_turns)
+
+        parts: List[str] = []
+        checks: List[Future] = []
+        pending_tokens = 0
+        for delta in self._stream_answer(messages):
+            parts.append(delta)
+            pending_tokens += count_tokens(delta)
+            if pending_tokens >= SPECULATIVE_CHECK_TOKENS:
+                pending_tokens = 0
+                checks.append(_PREFETCH_POOL.submit(
+                    self._check_coverage, static_prefix, evidence, "".join(parts)
+                ))
+        answer = "".join(parts)
+        # Checks still queued are dropped; running ones finish in the
+        # background but nobody waits on them
+        for check in checks:
+            check.cancel()
+        if _structural_ok(answer):
+            self.metrics.log_metric('validator_skipped', 1, {'paper_id': paper_id, 'reason': 'structure'})
+            return answer
+
+        # A finished check that already failed settles it; otherwise one
+        # last check over the complete draft is the only one waited on
+        finished = [check for check in checks if check.done() and not check.cancelled()]
+        if all(check.result() for check in finished):
+            covers_draft = not pending_tokens and bool(checks) and checks[-1] in finished
+            if covers_draft or self._check_coverage(static_prefix, evidence, answer):
+                self.metrics.log_metric('validator_skipped', 1, {'paper_id': paper_id, 'checks': len(finished)})
+                return answer
+        return self._validate(static_prefix, user_query, evidence, answer)
+
+    def _run_full_flow(
+        self,
+        static_prefix: str,
+        user_query: str,
+        chat_history: Optional[str],
+        rag_tool: RobustRAGTool,
+        base_rag_tool: PaperRAGTool,
+        small_llm: LLM,
+        large_llm: LLM
+    ) -> str:
+        """Planner crew -> batched retrieval -> synthesizer/validator crew"""
+        evidence, _ = self._plan_and_retrieve(
+            base_rag_tool.paper_id, static_prefix, user_query, chat_history,
+            rag_tool, small_llm, fast_path=False
+        )
+
+        # Synthesize, then validate only if the draft looks malformed
+        (synthesizer, validator), (synthesize_task, validate_task) = self._create_improved_flow(
+            static_prefix, user_query, evidence, base_rag_tool, large_llm
+        )
+        self._create_crew([synthesizer], [synthesize_task]).kickoff()
+        answer = str(synthesize_task.output.raw)
+        if _structural_ok(answer):
+            self.metrics.log_metric('validator_skipped', 1, {'paper_id': base_rag_tool.paper_id, 'reason': 'structure'})
+            return answer
+        self._create_crew([validator], [validate_task]).kickoff()
+        return self._apply_verdict(validate_task.output.raw, answer)
+
     def execute(
         self,
         paper_id: str,
         paper_title: str,
         user_query: str,
         chat_history: Optional[str] = None,
-        available_figures: Optional[List[str]] = None
-    ) -> Dict[str, Any]:
-        """Execute with full error handling optimized for Ollama"""
+        available_figures: Optional[List[str]] = None,
+        fast_path: bool = True
+    ) -> Union[str, Dict[str, Any]]:
+        """
+        Execute with full error handling optimized for Ollama.
+        Returns the Markdown answer, or an error dict if execution failed.
+        fast_path=False runs the full CrewAI agent flow (useful for debugging).
+        """
         
         start_time = time.time()
         
@@ -871,144 +1791,230 @@ Rules:
                     # Check if query is the same
                     if checkpoint['data'].get('query') == user_query:
                         logger.info("↻ Using cached result from checkpoint!")
-                        return checkpoint['data']
-            
+                        return checkpoint['data']['answer']
+
             # Get conversation history (limited for context window)
-            history = chat_history or self.memory_mgr.get_history(paper_id, last_n=2)
+            history = chat_history or self._stable_history_prefix(paper_id)
+
+            # Paraphrase of an earlier question answered without any history;
+            # a turn that sees history (the caller's or stored memory) depends
+            # on it, so it always runs the crew
+            if not history:
+                cached_answer = self.answer_cache.get(paper_id, user_query)
+                if cached_answer:
+                    self.metrics.log_metric('cache_hit', 1, {'paper_id': paper_id, 'cache': 'answer'})
+                    return cached_answer
             # Create LLMs
             small_llm, large_llm = self._create_llms()
-            base_rag_tool = PaperRAGTool(paper_id)
+            base_rag_tool = PaperRAGTool(paper_id, run_id=uuid.uuid4().hex)
             # Wrap RAG tool with robustness
-            
-            agents, tasks = self._create_improved_flow(paper_id, paper_title, user_query, base_rag_tool, small_llm, large_llm)
-            # Create crew (simplified for local)
-            crew = Crew(
-                agents=agents,
-                tasks=tasks,
-                process=Process.sequential,
-                verbose=True,
-                memory=False,
-                embedder={
-        "provider": "ollama",
-        "config": {
-            "model_name": "nomic-embed-text:v1.5",  # or "nomic-embed-text"
-             # Default Ollama URL
-        }
-    },
-                cache=True,
-                planning=False,  # Disable manager mode for speed
-                max_rpm=None,  # No rate limit for local
-                full_output=True
-            )
-            
-            # Execute
-            logger.info(f"🚀 Starting crew execution for: {user_query[:100]}")
-            result = crew.kickoff()
-            out = tasks[2].output.raw
-            # Extract answer from result
-            # if hasattr(result, 'raw'):
-            #     result = json.loads(result.raw)
-            #     answer = str(result["response"])
-            # else:
-            #     answer = str(result)
-            answer = str(out)
+            rag_tool = RobustRAGTool(base_rag_tool, self.cache)
+
+            static_prefix = _build_static_prefix(paper_id, paper_title, _load_outline(paper_id))
+
+            complex_query = _is_complex_query(user_query)
+            if complex_query and fast_path:
+                logger.info(f"🚀 Starting direct pipeline for: {user_query[:100]}")
+                answer = self._execute_fast(
+                    paper_id, static_prefix, user_query, history,
+                    rag_tool, small_llm
+                )
+            elif complex_query:
+                logger.info(f"🚀 Starting crew execution for: {user_query[:100]}")
+                answer = self._run_full_flow(
+                    static_prefix, user_query, history,
+                    rag_tool, base_rag_tool, small_llm, large_llm
+                )
+            else:
+                logger.info(f"⚡ Simple query, single-call fast path: {user_query[:100]}")
+                answer = self._fast_path(static_prefix, user_query, history, rag_tool, large_llm)
             
             # # Validate figures
             # fig_validator = FigureValidator(paper_id, available_figures)
             # validated_answer, warnings = fig_validator.validate_figure_refs(answer)
-            answer = inject_figures(
-                answer,
-                paper_id,
-                SessionLocal()
-            )
+            figures = FigureValidator(paper_id, available_figures).extract_figure_ids(answer)
+            with SessionLocal() as session:
+                answer = inject_figures(answer, paper_id, session)
+
+            self._record_turn(paper_id, user_query, answer, figures, start_time, history)
             return answer
-            if warnings:
-                for warning in warnings:
-                    logger.warning(f"⚠️ {warning}")
-            
-            # Build response
-            execution_time = time.time() - start_time
-            response = {
-                'status': 'success',
-                'paper_id': paper_id,
-                'query': user_query,
-                'answer': validated_answer,
-                'figures': fig_validator.extract_figure_ids(validated_answer),
-                'warnings': warnings,
-                'execution_time': execution_time,
-                'model_info': {
-                    'retriever': self.small_model,
-                    'analyst': self.large_model
-                },
-                'timestamp': datetime.now().isoformat()
-            }
-            
-            logger.info(f"✓ Execution completed in {execution_time:.2f}s")
-            
-            # Save checkpoint
-            self.checkpoint_mgr.save_checkpoint(
-                paper_id, "analysis", response, "success"
-            )
-            
-            # Save to memory (truncated)
-            self.memory_mgr.add_conversation(
-                paper_id, user_query, validated_answer[:500],
-                {'figures': response['figures'], 'execution_time': execution_time}
-            )
-            
-            # Log metrics
-            self.metrics.log_metric(
-                'execution_time', 
-                execution_time,
-                {
-                    'paper_id': paper_id, 
-                    'query_length': len(user_query),
-                    'answer_length': len(validated_answer)
-                }
-            )
-            
-            return validated_answer
             
         except Exception as e:
-            logger.error(f"❌ Crew execution failed: {str(e)}", exc_info=True)
-            
-            # Save failure checkpoint
-            error_data = {
-                'status': 'failed',
-                'error': str(e),
-                'error_type': type(e).__name__,
-                'paper_id': paper_id,
-                'query': user_query,
-                'timestamp': datetime.now().isoformat()
-            }
-            
-            self.checkpoint_mgr.save_checkpoint(
-                paper_id, "analysis", error_data, "failed"
+            return self._handle_failure(paper_id, paper_title, user_query, available_figures, e)
+
+    def _handle_failure(
+        self,
+        paper_id: str,
+        paper_title: str,
+        user_query: str,
+        available_figures: Optional[List[str]],
+        error: Exception
+    ) -> Union[str, Dict[str, Any]]:
+        """Checkpoint a failed run and try recovery; returns the recovered answer or the error dict"""
+        logger.error(f"❌ Crew execution failed: {str(error)}", exc_info=error)
+        
+        # Save failure checkpoint
+        error_data = {
+            'status': 'failed',
+            'error': str(error),
+            'error_type': type(error).__name__,
+            'paper_id': paper_id,
+            'query': user_query,
+            'timestamp': datetime.now().isoformat()
+        }
+        
+        self.checkpoint_mgr.save_checkpoint(
+            paper_id, "analysis", error_data, "failed"
+        )
+        
+        # Attempt recovery (once: a failing retry must not recurse again)
+        if self.enable_recovery and not getattr(self._in_recovery, 'active', False):
+            recovery_result = self._attempt_recovery(
+                paper_id, paper_title, user_query,
+                available_figures, error
             )
-            
-            # Attempt recovery
-            if self.enable_recovery:
-                recovery_result = self._attempt_recovery(
-                    paper_id, paper_title, user_query, base_rag_tool, 
-                    available_figures, e
-                )
-                if recovery_result:
-                    return recovery_result
-            
-            return error_data
+            if recovery_result:
+                return recovery_result
+        
+        return error_data
     
+    def _record_turn(
+        self,
+        paper_id: str,
+        user_query: str,
+        answer: str,
+        figures: List[str],
+        start_time: float,
+        history: Optional[str],
+        streamed: bool = False
+    ):
+        """Checkpoint, conversation memory, metrics and answer cache for a finished turn"""
+        execution_time = time.time() - start_time
+        response = {
+            'status': 'success',
+            'paper_id': paper_id,
+            'query': user_query,
+            'answer': answer,
+            'figures': figures,
+            'warnings': [],
+            'execution_time': execution_time,
+            'model_info': {
+                'retriever': self.small_model,
+                'analyst': self.large_model
+            },
+            'timestamp': datetime.now().isoformat()
+        }
+        
+        logger.info(f"✓ Execution completed in {execution_time:.2f}s")
+        
+        # Save checkpoint
+        self.checkpoint_mgr.save_checkpoint(
+            paper_id, "analysis", response, "success"
+        )
+        
+        # Save to memory (truncated)
+        self.memory_mgr.add_conversation(
+            paper_id, user_query, answer,
+            {'figures': figures, 'execution_time': execution_time}
+        )
+        
+        # Log metrics
+        metadata = {
+            'paper_id': paper_id, 
+            'query_length': len(user_query),
+            'answer_length': len(answer)
+        }
+        if streamed:
+            metadata['streamed'] = True
+        self.metrics.log_metric('execution_time', execution_time, metadata)
+
+        # Only answers produced without any history are cached; one that saw
+        # a conversation or stored memory must not serve unrelated paraphrases
+        if answer.strip() and not history:
+            self.answer_cache.set(paper_id, user_query, answer)
+
+    def execute_stream(
+        self,
+        paper_id: str,
+        paper_title: str,
+        user_query: str,
+        chat_history: Optional[str] = None,
+        fast_path: bool = True
+    ) -> Iterator[str]:
+        """
+        Streaming variant of execute(): planning and retrieval run as usual,
+        then the answer is generated with a single streamed LLM call and
+        yielded chunk by chunk (figure tags already injected), so the first
+        tokens arrive while the rest is still being generated.
+        """
+        start_time = time.time()
+        history = chat_history or self._stable_history_prefix(paper_id)
+        if not history:
+            cached_answer = self.answer_cache.get(paper_id, user_query)
+            if cached_answer:
+                self.metrics.log_metric('cache_hit', 1, {'paper_id': paper_id, 'cache': 'answer'})
+                yield cached_answer
+                return
+
+        # Everything up to the first token fails like execute() does: nothing
+        # has been sent yet, so a recovered answer can still replace it
+        try:
+            rag_tool = RobustRAGTool(PaperRAGTool(paper_id, run_id=uuid.uuid4().hex), self.cache)
+            static_prefix = _build_static_prefix(paper_id, paper_title, _load_outline(paper_id))
+
+            plan_turns: List[Dict[str, str]] = []
+            if _is_complex_query(user_query):
+                logger.info(f"🚀 Starting streamed crew execution for: {user_query[:100]}")
+                small_llm, _ = self._create_llms()
+                evidence, plan_turns = self._plan_and_retrieve(
+                    paper_id, static_prefix, user_query, history,
+                    rag_tool, small_llm, fast_path=fast_path
+                )
+            else:
+                logger.info(f"⚡ Simple query, single-call fast path: {user_query[:100]}")
+                evidence = rag_tool.search(user_query)
+
+            deltas = self._stream_answer(
+                self._answer_messages(static_prefix, user_query, evidence, history, plan_turns)
+            )
+            first = next(deltas, "")
+        except Exception as e:
+            result = self._handle_failure(paper_id, paper_title, user_query, None, e)
+            if isinstance(result, dict):
+                raise
+            yield result
+            return
+
+        # Raw deltas keep the <figure:ID> tags the injected output no longer has
+        raw_parts: List[str] = [first]
+        def recorded():
+            yield first
+            for delta in deltas:
+                raw_parts.append(delta)
+                yield delta
+
+        parts = []
+        for part in _stream_with_figures(recorded(), paper_id):
+            parts.append(part)
+            yield part
+
+        figures = FigureValidator(paper_id).extract_figure_ids("".join(raw_parts))
+        self._record_turn(
+            paper_id, user_query, "".join(parts), figures, start_time, history, streamed=True
+        )
+
     def _attempt_recovery(
         self,
         paper_id: str,
         paper_title: str,
         user_query: str,
-        base_rag_tool,
         available_figures: Optional[List[str]],
         error: Exception
-    ) -> Optional[Dict]:
+    ) -> Optional[str]:
         """Attempt recovery strategies"""
         logger.info("🔄 Attempting recovery...")
         
+        self._in_recovery.active = True
         try:
             # Strategy 1: Clear memory and retry with fresh context
             logger.info("Recovery: Clearing short-term memory")
@@ -1016,19 +2022,20 @@ Rules:
             
             # Retry with fresh state
             result = self.execute(
-                paper_id, paper_title, user_query, base_rag_tool,
+                paper_id, paper_title, user_query,
                 chat_history="",  # Fresh start
                 available_figures=available_figures
             )
             
-            if result.get('status') == 'success':
-                logger.info("✓ Recovery successful!")
-                result['recovered'] = True
-                result['recovery_strategy'] = 'memory_clear'
+            # execute() returns the answer text on success, an error dict otherwise
+            if isinstance(result, str):
+                logger.info("✓ Recovery successful (strategy: memory_clear)")
                 return result
                 
         except Exception as e:
             logger.error(f"Recovery failed: {str(e)}")
+        finally:
+            self._in_recovery.active = False
         
         return None
 
@@ -1037,18 +2044,43 @@ Rules:
 # MAIN INTERFACE
 # ============================================================================
 
+@lru_cache(maxsize=8)
+def _get_crew(
+    ollama_base_url: str,
+    small_model: str,
+    large_model: str,
+    enable_recovery: bool,
+    enable_thinking: bool
+) -> "ProductionPaperCrew":
+    """
+    One crew per configuration for the life of the process, so the Ollama
+    health check, model preload, LLM clients and the cache/memory stores are
+    set up once instead of on every query.
+    """
+    return ProductionPaperCrew(
+        ollama_base_url=ollama_base_url,
+        small_model=small_model,
+        large_model=large_model,
+        enable_recovery=enable_recovery,
+        enable_thinking=enable_thinking
+    )
+
+
 def run_paper_crew(
     paper_id: str,
     paper_title: str,
     user_query: str,
     ollama_base_url: str = "http://localhost:11434",
+    # Default Ollama tags are the Q4_K_M instruct builds
+    # (same as qwen2.5:3b-instruct-q4_K_M / qwen2.5:7b-instruct-q4_K_M)
     small_model: str = "qwen2.5:3b",
     large_model: str = "qwen2.5:7b",
     chat_history: Optional[str] = None,
     available_figures: Optional[List[str]] = None,
     enable_recovery: bool = False,
-    enable_thinking: bool = False
-) -> Dict[str, Any]:
+    enable_thinking: bool = False,
+    fast_path: bool = True
+) -> Union[str, Dict[str, Any]]:
     """
     Main entry point for production paper crew (Ollama optimized)
     
@@ -1064,25 +2096,24 @@ def run_paper_crew(
         available_figures: List of figure IDs in the paper (for validation)
         enable_recovery: Enable automatic recovery on failure
         enable_thinking: Enable extended thinking (slower but better)
+        fast_path: Direct LLM pipeline instead of CrewAI agents (False for debugging)
     
     Returns:
+        The Markdown answer (figures injected). On failure, an error dict:
         {
-            'status': 'success' | 'failed',
-            'answer': str (Markdown formatted),
-            'figures': List[str] (figure IDs to embed),
-            'warnings': List[str],
-            'execution_time': float,
-            'model_info': dict,
+            'status': 'failed',
+            'error': str,
+            'error_type': str,
+            'paper_id': str,
+            'query': str,
             'timestamp': str
         }
+        The full success record (figures, timings, model info) is saved
+        as the "analysis" checkpoint.
     """
     
-    crew = ProductionPaperCrew(
-        ollama_base_url=ollama_base_url,
-        small_model=small_model,
-        large_model=large_model,
-        enable_recovery=enable_recovery,
-        enable_thinking=enable_thinking
+    crew = _get_crew(
+        ollama_base_url, small_model, large_model, enable_recovery, enable_thinking
     )
     
     result = crew.execute(
@@ -1090,12 +2121,40 @@ def run_paper_crew(
         paper_title=paper_title,
         user_query=user_query,
        chat_history=chat_history,
-        available_figures=available_figures
+        available_figures=available_figures,
+        fast_path=fast_path
     )
     
     return result
 
 
+def run_paper_crew_stream(
+    paper_id: str,
+    paper_title: str,
+    user_query: str,
+    ollama_base_url: str = "http://localhost:11434",
+    small_model: str = "qwen2.5:3b",
+    large_model: str = "qwen2.5:7b",
+    chat_history: Optional[str] = None,
+    enable_recovery: bool = False,
+    fast_path: bool = True
+) -> Iterator[str]:
+    """
+    Streaming entry point: same arguments as run_paper_crew, but yields the
+    Markdown answer in chunks as the final LLM call generates it. A failure
+    before the first chunk is checkpointed (and recovered when enabled)
+    like in run_paper_crew; if it can't be recovered, it is raised.
+    """
+    crew = _get_crew(ollama_base_url, small_model, large_model, enable_recovery, False)
+    yield from crew.execute_stream(
+        paper_id=paper_id,
+        paper_title=paper_title,
+        user_query=user_query,
+        chat_history=chat_history,
+        fast_path=fast_path
+    )
+
+
 # ============================================================================
 # POST-PROCESSING: Inject Base64 Figures
 # ============================================================================
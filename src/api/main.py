@@ -1,24 +1,55 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 import logging
 
-from src.db.sql_db import init_db
+from src.core.config import get_settings
+from src.db.sql_db import init_db, async_engine
 from src.api.routes import papers, chat, ideas, projects, settings
 
 logger = logging.getLogger(__name__)
 
-# Initialize DB
-init_db()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Initialize DB at startup rather than as an import side effect
+    init_db()
+    # Pick up papers left pending or half-ingested by the previous run
+    from src.ingestion.tasks import resume_pending
+    resume_pending()
+    yield
+    # Mindmap writes still waiting on their batching timer would die with it
+    ideas.flush_pending_mindmaps()
+    # Drain the shared upstream and database connection pools on shutdown
+    await papers.http_client.aclose()
+    await async_engine.dispose()
 
-app = FastAPI()
+# orjson serializes every endpoint's JSON response (feeds, mindmaps, ...)
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
-# CORS middleware
+# Streamed chat answers; gzip would hold tokens back in its compression buffer
+STREAMING_PATHS = ("/api/chat", "/api/project-chat")
+
+class StreamAwareGZipMiddleware(GZipMiddleware):
+    """GZip for regular responses, passthrough for token streams."""
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] in STREAMING_PATHS:
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+app.add_middleware(StreamAwareGZipMiddleware, minimum_size=1024)
+
+# CORS middleware: only the frontend's origin(s); browsers cache preflights
+# for a day instead of re-sending OPTIONS before every request
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    allow_origins=[origin.strip() for origin in get_settings().FRONTEND_URL.split(",")],
     allow_credentials=True,
-    allow_methods=["*"],
+    allow_methods=["GET", "POST", "DELETE"],
     allow_headers=["*"],
+    max_age=86400,
 )
 
 app.include_router(papers.router, prefix="/api", tags=["papers"])
@@ -1,10 +1,13 @@
 from typing import List, Dict, Any, Optional
 from fastapi import APIRouter, HTTPException, Depends
 from fastapi.responses import StreamingResponse
+from sqlalchemy import func
 from sqlalchemy.orm import Session
+import asyncio
 import datetime
 import logging
 import json
+from string import Template
 
 from src.db.sql_db import get_db, Conversation, Message, UserPaper, SessionLocal
 from src.api.schemas import ChatRequest, ProjectChatRequest, ConversationCreate, ConversationResponse
@@ -12,6 +15,110 @@ from src.api.schemas import ChatRequest, ProjectChatRequest, ConversationCreate,
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# Chat prompts, parsed once at import rather than re-built per request
+_CHAT_PROMPT = Template("""You are a precise research assistant labeled 'Shodh AI'.
+You are analyzing the $type "$name".
+$dimensions
+GOAL: Answer the user's question using the provided context and respect the research dimensions if provided.
+If it's a PROJECT, synthesize info across multiple papers.
+FORMAT: Use clear, structured Markdown.
+- Use **bold** for key concepts.
+- Use bullet points for lists.
+- Keep responses concise and note-like.
+ 
+CONTEXT FROM PAPERS:
+$context
+ 
+$history
+USER: $message
+ 
+A:""")
+
+_PROJECT_CHAT_PROMPT = Template("""You are 'Shodh AI', a research architect synthesizing multiple papers for the project "$name".
+
+$dimensions
+
+PAPERS IN THIS PROJECT:
+$papers
+
+GOAL: Synthesize the provided context to answer the user's query thoughtfully. 
+Relate findings across different papers where applicable.
+
+CONTEXT:
+$context
+
+$history
+USER: $message
+A:""")
+
+
+# --- Blocking DB helpers (run via asyncio.to_thread from async endpoints) ---
+
+def _start_turn(db: Session, conversation_id: Optional[int], message: str,
+                paper_id: Optional[str] = None, project_id: Optional[int] = None) -> int:
+    """Get or create the conversation and save the user's message. Returns the conversation id."""
+    if not conversation_id:
+        conv = Conversation(
+            paper_id=paper_id,
+            project_id=project_id,
+            title=message[:50] + "..." if len(message) > 50 else message
+        )
+        db.add(conv)
+        db.flush()  # assigns the id; committed together with the message
+        conversation_id = conv.id
+    else:
+        conv = db.get(Conversation, conversation_id)
+        if conv:
+            conv.updated_at = datetime.datetime.utcnow()
+
+    db.add(Message(
+        conversation_id=conversation_id,
+        role="user",
+        content=message
+    ))
+    db.commit()
+    return conversation_id
+
+
+def _save_assistant_message(conversation_id: int, content: str, citations: List[Dict[str, Any]], mode: str):
+    db_save = SessionLocal()
+    try:
+        db_save.add(Message(
+            conversation_id=conversation_id,
+            role="assistant",
+            content=content,
+            citations_json=json.dumps(citations) if citations else None,
+            mode=mode
+        ))
+        db_save.commit()
+    finally:
+        db_save.close()
+
+
+def _log_save_failure(future: asyncio.Future):
+    if not future.cancelled() and future.exception() is not None:
+        logger.error(f"Failed to save assistant message: {future.exception()}")
+
+
+def _persist_reply(conversation_id: int, content: str, citations: List[Dict[str, Any]], mode: str):
+    """
+    Save a streamed reply from the generator's finally block. Handed to a
+    worker thread without awaiting, so it still runs when the client
+    disconnected and the stream task is being cancelled.
+    """
+    if not content:
+        return
+    future = asyncio.get_running_loop().run_in_executor(
+        None, _save_assistant_message, conversation_id, content, citations, mode
+    )
+    future.add_done_callback(_log_save_failure)
+
+
+def _load_project(db: Session, project_id: int):
+    """Project with its papers loaded, so callers can read them off-thread."""
+    from sqlalchemy.orm import selectinload
+    from src.db.sql_db import Project
+    return db.query(Project).options(selectinload(Project.papers)).filter(Project.id == project_id).first()
 
 
 # --- Endpoints ---
@@ -23,7 +130,13 @@ def list_conversations(
     db: Session = Depends(get_db)
 ):
     """List all conversations for a paper or project."""
-    query = db.query(Conversation)
+    # Message counts aggregated in the same round trip instead of one COUNT per row
+    msg_count = func.count(Message.id)
+    query = (
+        db.query(Conversation, msg_count)
+        .outerjoin(Message, Message.conversation_id == Conversation.id)
+        .group_by(Conversation.id)
+    )
     if paper_id:
         query = query.filter(Conversation.paper_id == paper_id)
     elif project_id:
@@ -34,15 +147,14 @@ def list_conversations(
     conversations = query.order_by(Conversation.updated_at.desc()).all()
     
     result = []
-    for conv in conversations:
-        msg_count = db.query(Message).filter(Message.conversation_id == conv.id).count()
+    for conv, message_count in conversations:
         result.append({
             "id": conv.id,
             "paper_id": conv.paper_id,
             "project_id": conv.project_id,
             "title": conv.title,
             "created_at": conv.created_at.isoformat() if conv.created_at else None,
-            "message_count": msg_count
+            "message_count": message_count
         })
     return result
 
@@ -95,14 +207,12 @@ async def chat_with_paper(request: ChatRequest, db: Session = Depends(get_db)):
     - Line 1: JSON Metadata (conversation_id, citations, mode)
     - Line 2+: Content tokens
     """
-    from src.db.sql_db import Project
-    
     # Identify retrieval context
     paper_ids = []
     context_meta = {} # To hold paper info for prompt
     
     if request.project_id:
-        project = db.query(Project).filter(Project.id == request.project_id).first()
+        project = await asyncio.to_thread(_load_project, db, request.project_id)
         if not project:
             raise HTTPException(status_code=404, detail="Project not found")
         paper_ids = [p.paper_id for p in project.papers if p.ingestion_status == "completed"]
@@ -110,10 +220,13 @@ async def chat_with_paper(request: ChatRequest, db: Session = Depends(get_db)):
             raise HTTPException(status_code=400, detail="No ingested papers in this project yet.")
         context_meta["name"] = project.name
         context_meta["type"] = "project"
+        context_meta["dimensions"] = project.research_dimensions
     else:
         if not request.paper_id:
             raise HTTPException(status_code=400, detail="Either paper_id or project_id must be provided.")
-        paper = db.query(UserPaper).filter(UserPaper.paper_id == request.paper_id).first()
+        paper = await asyncio.to_thread(
+            lambda: db.query(UserPaper).filter(UserPaper.paper_id == request.paper_id).first()
+        )
         if not paper:
             raise HTTPException(status_code=404, detail="Paper not found")
         if paper.ingestion_status != "completed":
@@ -122,41 +235,23 @@ async def chat_with_paper(request: ChatRequest, db: Session = Depends(get_db)):
         context_meta["name"] = paper.title
         context_meta["type"] = "paper"
 
-    # Get or create conversation
-    conversation_id = request.conversation_id
-    if not conversation_id:
-        conv = Conversation(
-            paper_id=request.paper_id,
-            project_id=request.project_id,
-            title=request.message[:50] + "..." if len(request.message) > 50 else request.message
-        )
-        db.add(conv)
-        db.commit()
-        db.refresh(conv)
-        conversation_id = conv.id
-    else:
-        conv = db.query(Conversation).filter(Conversation.id == conversation_id).first()
-        if conv:
-            conv.updated_at = datetime.datetime.utcnow()
-            db.commit()
-
-    # Save User Message immediately
-    user_msg = Message(
-        conversation_id=conversation_id,
-        role="user",
-        content=request.message
+    # Get or create conversation and save the user message immediately
+    conversation_id = await asyncio.to_thread(
+        _start_turn, db, request.conversation_id, request.message,
+        paper_id=request.paper_id, project_id=request.project_id
     )
-    db.add(user_msg)
-    db.commit()
 
     async def chat_generator():
         from src.core.config import get_settings
         from src.core.retriever import PaperRetriever
-        from starlette.concurrency import run_in_threadpool
+        from starlette.concurrency import iterate_in_threadpool
         from src.core.llm_factory import LLMFactory
         
         settings = get_settings()
         retriever = PaperRetriever()
+        final_response_text = ""
+        citations = []
+        mode = "contextual"
         
         try:
             # History
@@ -167,33 +262,28 @@ async def chat_with_paper(request: ChatRequest, db: Session = Depends(get_db)):
                     content = msg.get('content', '')
                     history_text += f"{role.upper()}: {content}\n"
 
-            final_response_text = ""
-            citations = []
-            mode = "contextual"
-
             if request.use_agent:
-                # === AGENTIC RAG (Non-streaming for Project Synthesis) ===
+                # === AGENTIC RAG (crew plans + retrieves, answer is streamed) ===
                 mode = "agent"
-                from src.agents.paper_crew import run_paper_crew
+                from src.agents.paper_crew import run_paper_crew_stream
                 
                 # Use first paper for Agent if deep-dive, else generic synthesis
                 target_paper_id = request.paper_id if request.paper_id else paper_ids[0]
-                
-                response_text = await run_in_threadpool(
-                    run_paper_crew,
-                    paper_id=target_paper_id,
-                    paper_title=context_meta["name"],
-                    user_query=request.message,
-                    chat_history=history_text if history_text else None
-                )
-                final_response_text = response_text
 
-                # Retrieve citations from PROJECT context (multi-paper)
-                retrieved = await retriever.aquery(
-                    query_text=request.message,
-                    paper_id=paper_ids,
-                    top_k=5
-                )
+                if paper_ids == [target_paper_id]:
+                    # Same search the crew runs for the question; retrieving it
+                    # through the tool's chunk cache lets the crew reuse it
+                    from src.tools.rag_tool import PaperRAGTool
+                    retrieved = await asyncio.to_thread(
+                        PaperRAGTool(target_paper_id).retrieve, request.message
+                    )
+                else:
+                    # Retrieve citations from PROJECT context (multi-paper)
+                    retrieved = await retriever.aquery(
+                        query_text=request.message,
+                        paper_id=paper_ids,
+                        top_k=5
+                    )
                 for chunk in retrieved:
                     citations.append({
                         "content": chunk['content'],
@@ -204,7 +294,16 @@ async def chat_with_paper(request: ChatRequest, db: Session = Depends(get_db)):
                     })
 
                 yield json.dumps({"conversation_id": conversation_id, "citations": citations, "mode": mode}) + "\n"
-                yield response_text
+
+                # The crew plans and retrieves first, then streams the answer
+                async for token in iterate_in_threadpool(run_paper_crew_stream(
+                    paper_id=target_paper_id,
+                    paper_title=context_meta["name"],
+                    user_query=request.message,
+                    chat_history=history_text if history_text else None
+                )):
+                    final_response_text += token
+                    yield token
 
             else:
                 # === CONTEXTUAL RAG (Streaming) ===
@@ -235,26 +334,17 @@ async def chat_with_paper(request: ChatRequest, db: Session = Depends(get_db)):
                 llm = LLMFactory.get_llama_index_llm()
                 
                 dimensions_context = ""
-                if request.project_id and project.research_dimensions:
-                    dimensions_context = f"\nRESEARCH DIMENSIONS & GOALS FOR THIS PROJECT:\n{project.research_dimensions}\n"
-
-                prompt = f"""You are a precise research assistant labeled 'Shodh AI'.
-You are analyzing the {context_meta['type']} "{context_meta['name']}".
-{dimensions_context}
-GOAL: Answer the user's question using the provided context and respect the research dimensions if provided.
-If it's a PROJECT, synthesize info across multiple papers.
-FORMAT: Use clear, structured Markdown.
-- Use **bold** for key concepts.
-- Use bullet points for lists.
-- Keep responses concise and note-like.
- 
-CONTEXT FROM PAPERS:
-{context}
- 
-{history_text}
-USER: {request.message}
- 
-A:"""
+                if context_meta.get("dimensions"):
+                    dimensions_context = f"\nRESEARCH DIMENSIONS & GOALS FOR THIS PROJECT:\n{context_meta['dimensions']}\n"
+
+                prompt = _CHAT_PROMPT.substitute(
+                    type=context_meta['type'],
+                    name=context_meta['name'],
+                    dimensions=dimensions_context,
+                    context=context,
+                    history=history_text,
+                    message=request.message
+                )
                 
                 yield json.dumps({"conversation_id": conversation_id, "citations": citations, "mode": mode}) + "\n"
 
@@ -265,26 +355,12 @@ A:"""
                         final_response_text += token
                         yield token
 
-            # Post-stream save
-            db_save = SessionLocal()
-            try:
-                assistant_msg = Message(
-                    conversation_id=conversation_id,
-                    role="assistant",
-                    content=final_response_text,
-                    citations_json=json.dumps(citations) if citations else None,
-                    mode=mode
-                )
-                db_save.add(assistant_msg)
-                db_save.commit()
-            except Exception as e:
-                logger.error(f"Failed to save assistant message: {e}")
-            finally:
-                db_save.close()
-
         except Exception as e:
             logger.exception(f"Chat stream error: {e}")
             yield f"\n\n[Error processing request: {str(e)}]"
+        finally:
+            # Also on disconnect: keep whatever was generated
+            _persist_reply(conversation_id, final_response_text, citations, mode)
 
     return StreamingResponse(chat_generator(), media_type="text/plain")
 @router.post("/project-chat")
@@ -293,9 +369,7 @@ async def project_chat(request: ProjectChatRequest, db: Session = Depends(get_db
     Dedicated endpoint for project-level chat/synthesis.
     Fetches project details, papers, and uses research dimensions to guide the response.
     """
-    from src.db.sql_db import Project
-    
-    project = db.query(Project).filter(Project.id == request.project_id).first()
+    project = await asyncio.to_thread(_load_project, db, request.project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
         
@@ -305,41 +379,27 @@ async def project_chat(request: ProjectChatRequest, db: Session = Depends(get_db
         
     paper_info = [f"- {p.title} (ArXiv: {p.paper_id})" for p in project.papers]
     paper_list_str = "\n".join(paper_info)
+    # Read before _start_turn commits (which expires the loaded project)
+    project_name = project.name
+    research_dimensions = project.research_dimensions
     
-    # Get or create conversation
-    conversation_id = request.conversation_id
-    if not conversation_id:
-        conv = Conversation(
-            project_id=request.project_id,
-            title=request.message[:50] + "..." if len(request.message) > 50 else request.message
-        )
-        db.add(conv)
-        db.commit()
-        db.refresh(conv)
-        conversation_id = conv.id
-    else:
-        conv = db.query(Conversation).filter(Conversation.id == conversation_id).first()
-        if conv:
-            conv.updated_at = datetime.datetime.utcnow()
-            db.commit()
-
-    # Save User Message
-    user_msg = Message(
-        conversation_id=conversation_id,
-        role="user",
-        content=request.message
+    # Get or create conversation and save the user message
+    conversation_id = await asyncio.to_thread(
+        _start_turn, db, request.conversation_id, request.message,
+        project_id=request.project_id
     )
-    db.add(user_msg)
-    db.commit()
 
     async def project_chat_generator():
         from src.core.config import get_settings
         from src.core.retriever import PaperRetriever
-        from starlette.concurrency import run_in_threadpool
+        from starlette.concurrency import iterate_in_threadpool
         from src.core.llm_factory import LLMFactory
         
         settings = get_settings()
         retriever = PaperRetriever()
+        final_response_text = ""
+        citations = []
+        mode = "agent" if request.use_agent else "contextual"
         
         try:
             history_text = ""
@@ -349,21 +409,8 @@ async def project_chat(request: ProjectChatRequest, db: Session = Depends(get_db
                     content = msg.get('content', '')
                     history_text += f"{role.upper()}: {content}\n"
 
-            final_response_text = ""
-            citations = []
-            mode = "agent" if request.use_agent else "contextual"
-
             if request.use_agent:
-                from src.agents.paper_crew import run_paper_crew
-                # For project synthesis agent, use a generic multi-paper approach
-                response_text = await run_in_threadpool(
-                    run_paper_crew,
-                    paper_id=paper_ids[0], # Using first paper as anchor for now
-                    paper_title=project.name,
-                    user_query=f"Analyze across these papers: {request.message}",
-                    chat_history=history_text if history_text else None
-                )
-                final_response_text = response_text
+                from src.agents.paper_crew import run_paper_crew_stream
                 
                 # Retrieval for citations
                 retrieved = await retriever.aquery(request.message, paper_id=paper_ids, top_k=5)
@@ -376,7 +423,16 @@ async def project_chat(request: ProjectChatRequest, db: Session = Depends(get_db
                     })
                 
                 yield json.dumps({"conversation_id": conversation_id, "citations": citations, "mode": mode}) + "\n"
-                yield response_text
+
+                # For project synthesis agent, use a generic multi-paper approach
+                async for token in iterate_in_threadpool(run_paper_crew_stream(
+                    paper_id=paper_ids[0], # Using first paper as anchor for now
+                    paper_title=project_name,
+                    user_query=f"Analyze across these papers: {request.message}",
+                    chat_history=history_text if history_text else None
+                )):
+                    final_response_text += token
+                    yield token
             else:
                 retrieved = await retriever.aquery(request.message, paper_id=paper_ids, top_k=10)
                 context_parts = []
@@ -391,24 +447,16 @@ async def project_chat(request: ProjectChatRequest, db: Session = Depends(get_db
                     })
                 
                 context = "\n\n".join(context_parts)
-                dimensions = f"\nPROJECT GOALS & DIMENSIONS:\n{project.research_dimensions}\n" if project.research_dimensions else ""
+                dimensions = f"\nPROJECT GOALS & DIMENSIONS:\n{research_dimensions}\n" if research_dimensions else ""
                 
-                prompt = f"""You are 'Shodh AI', a research architect synthesizing multiple papers for the project "{project.name}".
-
-{dimensions}
-
-PAPERS IN THIS PROJECT:
-{paper_list_str}
-
-GOAL: Synthesize the provided context to answer the user's query thoughtfully. 
-Relate findings across different papers where applicable.
-
-CONTEXT:
-{context}
-
-{history_text}
-USER: {request.message}
-A:"""
+                prompt = _PROJECT_CHAT_PROMPT.substitute(
+                    name=project_name,
+                    dimensions=dimensions,
+                    papers=paper_list_str,
+                    context=context,
+                    history=history_text,
+                    message=request.message
+                )
                 
                 yield json.dumps({"conversation_id": conversation_id, "citations": citations, "mode": mode}) + "\n"
                 llm = LLMFactory.get_llama_index_llm()
@@ -418,23 +466,10 @@ A:"""
                         final_response_text += chunk.delta
                         yield chunk.delta
 
-            # Save assistant message
-            db_save = SessionLocal()
-            try:
-                assistant_msg = Message(
-                    conversation_id=conversation_id,
-                    role="assistant",
-                    content=final_response_text,
-                    citations_json=json.dumps(citations) if citations else None,
-                    mode=mode
-                )
-                db_save.add(assistant_msg)
-                db_save.commit()
-            finally:
-                db_save.close()
-
         except Exception as e:
             logger.exception(f"Project chat error: {e}")
             yield f"\n\n[Error: {str(e)}]"
+        finally:
+            _persist_reply(conversation_id, final_response_text, citations, mode)
 
     return StreamingResponse(project_chat_generator(), media_type="text/plain")
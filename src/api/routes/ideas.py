@@ -1,10 +1,12 @@
-from typing import List, Dict, Any, Optional
+import threading
+from concurrent.futures import Future
+from typing import Callable, List, Dict, Any, Optional
 from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
-import json
+import orjson
 
-from src.db.sql_db import get_db
 from src.api.schemas import IdeaRequest
+from src.core import semantic_cache
+from src.core.arxiv_meta import fetch_arxiv_meta
 
 from src.agents.idea_generation_agent import IdeaGenerationAgent
 from src.agents.visualization_agent import VisualizationAgent
@@ -18,39 +20,141 @@ logger = logging.getLogger(__name__)
 idea_agent = IdeaGenerationAgent()
 vis_agent = VisualizationAgent()
 
+# (kind, paper_id) -> Future of the generation already running for it
+_inflight: Dict[tuple, Future] = {}
+_inflight_lock = threading.Lock()
+
+def _single_flight(key: tuple, fn: Callable, *args):
+    """
+    Run fn(*args) at most once per key at a time. Requests arriving while it
+    runs (e.g. many users opening a trending paper) wait for and share the
+    result instead of each paying for an LLM call.
+    """
+    with _inflight_lock:
+        future = _inflight.get(key)
+        leader = future is None
+        if leader:
+            future = _inflight[key] = Future()
+    if not leader:
+        return future.result()
+    try:
+        result = fn(*args)
+        future.set_result(result)
+        return result
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+
+def _stored_paper(paper_id: str):
+    """
+    The paper's vector-store entry as (collection, metadata, document), or
+    None if it was never ingested. A failing lookup is retried once before
+    falling back, since the fallback costs an arXiv fetch and an LLM call.
+    """
+    from src.core.retriever import PaperRetriever
+    for attempt in range(2):
+        try:
+            collection = PaperRetriever()._get_vector_store().collection
+            data = collection.get(ids=[paper_id])
+            break
+        except Exception as e:
+            if attempt:
+                logger.warning(f"Vector store lookup failed for {paper_id}: {e}")
+                return None
+    if not data['ids']:
+        return None
+    return collection, data['metadatas'][0], data['documents'][0]
+
+# paper_id -> Chroma metadata awaiting write. Writes arriving within one
+# interval go out as a single collection.update, off the response path.
+MINDMAP_FLUSH_INTERVAL = 0.5
+_pending_mindmaps: Dict[str, Dict[str, Any]] = {}
+_pending_lock = threading.Lock()
+_flush_timer: Optional[threading.Timer] = None
+
+def _persist_mindmap(collection, paper_id: str, metadata: Dict[str, Any]):
+    global _flush_timer
+    with _pending_lock:
+        _pending_mindmaps[paper_id] = metadata
+        if _flush_timer is None:
+            _flush_timer = threading.Timer(MINDMAP_FLUSH_INTERVAL, _flush_mindmaps, args=(collection,))
+            _flush_timer.daemon = True
+            _flush_timer.start()
+
+def _flush_mindmaps(collection):
+    global _flush_timer
+    with _pending_lock:
+        pending = dict(_pending_mindmaps)
+        _pending_mindmaps.clear()
+        _flush_timer = None
+    if not pending:
+        return
+    try:
+        collection.update(ids=list(pending), metadatas=list(pending.values()))
+        logger.info(f"Cached {len(pending)} mindmap(s) in Chroma")
+    except Exception as e:
+        logger.error(f"Failed to cache mindmaps for {list(pending)}: {e}")
+
+def flush_pending_mindmaps():
+    """Write queued mindmaps now instead of waiting on the daemon timer (shutdown)."""
+    with _pending_lock:
+        timer = _flush_timer
+    if timer is not None:
+        timer.cancel()
+        _flush_mindmaps(*timer.args)
+
+def _ideas_for(paper: Dict[str, Any]) -> List[str]:
+    """Ideas for a paper, reusing those of a near-identical paper (v2, cross-list)."""
+    ideas, embedding = semantic_cache.lookup("ideas", semantic_cache.paper_text(paper))
+    if ideas is None:
+        ideas = list(idea_agent.generate_ideas(paper))
+        if ideas and ideas != ["LLM not configured"]:
+            semantic_cache.store("ideas", embedding, ideas)
+    return ideas
+
+def _mindmap_for(paper: Dict[str, Any]) -> Dict[str, Any]:
+    """Mindmap for a paper, reusing that of a near-identical paper."""
+    mindmap, embedding = semantic_cache.lookup("mindmap", semantic_cache.paper_text(paper))
+    if mindmap is None:
+        mindmap = vis_agent.generate_mindmap(paper)
+        # Error / unconfigured placeholders have no children; don't cache them
+        if mindmap.get("children"):
+            semantic_cache.store("mindmap", embedding, mindmap)
+    return mindmap
+
 @router.post("/generate_ideas")
-def generate_ideas(request: IdeaRequest, db: Session = Depends(get_db)):
+def generate_ideas(request: IdeaRequest):
     # Check if we have it in Chroma first (must be saved/ingested)
     # If not, we can try to fetch on-the-fly or demand save first.
     # For UX, let's fetch on the fly if not in DB, but better to check Chroma.
     
-    try:
-        from src.core.retriever import PaperRetriever
-        retriever = PaperRetriever()
-        data = retriever._get_vector_store().collection.get(ids=[request.paper_id])
-        if data['ids']:
-             paper_content = {
-                "title": data['metadatas'][0].get('title'),
-                "abstract": data['documents'][0],
-                "metrics": {}
-            }
-             return {"paper_id": request.paper_id, "ideas": idea_agent.generate_ideas(paper_content)}
-    except:
-        pass
-        
+    stored = _stored_paper(request.paper_id)
+    if stored:
+        _, metadata, document = stored
+        paper_content = {
+            "title": metadata.get('title'),
+            "abstract": document,
+            "metrics": {}
+        }
+        return {"paper_id": request.paper_id, "ideas": _single_flight(("ideas", request.paper_id), _ideas_for, paper_content)}
+
     # Fallback: Fetch directly from Arxiv for generation (if not saved/ingested yet)
     # This allows generating ideas on non-saved papers too!
     try:
-        import arxiv
-        client = arxiv.Client()
-        search = arxiv.Search(id_list=[request.paper_id])
-        res = next(client.results(search))
+        meta = fetch_arxiv_meta(request.paper_id)
+        if meta is None:
+            raise HTTPException(status_code=404, detail="Paper not found on ArXiv.")
         paper_content = {
-            "title": res.title,
-            "abstract": res.summary,
+            "title": meta["title"],
+            "abstract": meta["abstract"],
             "metrics": {}
         }
-        return {"paper_id": request.paper_id, "ideas": idea_agent.generate_ideas(paper_content)}
+        return {"paper_id": request.paper_id, "ideas": _single_flight(("ideas", request.paper_id), _ideas_for, paper_content)}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=404, detail=f"Paper not found or error generating: {e}")
 
@@ -60,38 +164,30 @@ def visualize_paper(request: IdeaRequest):
     # Note: Visualization expects JSON structure.
     
     # 1. Try Cache/Chroma
-    try:
-        from src.core.retriever import PaperRetriever
-        retriever = PaperRetriever()
-        store = retriever._get_vector_store()
-        
-        data = store.collection.get(ids=[request.paper_id])
-        if data['ids']:
-            metadata = data['metadatas'][0]
-            if metadata.get("mindmap_json"):
-                import json
-                return {"paper_id": request.paper_id, "mindmap": json.loads(metadata.get("mindmap_json"))}
-            
-            # Generate from content
-            paper = {"title": metadata.get('title'), "abstract": data['documents'][0]}
-            mindmap_data = vis_agent.generate_mindmap(paper)
-            
-            # Cache it
-            import json
-            metadata["mindmap_json"] = json.dumps(mindmap_data)
-            store.collection.update(ids=[request.paper_id], metadatas=[metadata])
-            return {"paper_id": request.paper_id, "mindmap": mindmap_data}
-    except:
-        pass
+    stored = _stored_paper(request.paper_id)
+    if stored:
+        collection, metadata, document = stored
+        if metadata.get("mindmap_json"):
+            return {"paper_id": request.paper_id, "mindmap": orjson.loads(metadata.get("mindmap_json"))}
+
+        # Generate from content
+        paper = {"title": metadata.get('title'), "abstract": document}
+        mindmap_data = _single_flight(("mindmap", request.paper_id), _mindmap_for, paper)
+
+        # Cache it (written in the background, batched with other papers)
+        metadata["mindmap_json"] = orjson.dumps(mindmap_data).decode()
+        _persist_mindmap(collection, request.paper_id, metadata)
+        return {"paper_id": request.paper_id, "mindmap": mindmap_data}
 
     # 2. Live Generation (if not in DB or error)
     try:
-        import arxiv
-        client = arxiv.Client()
-        search = arxiv.Search(id_list=[request.paper_id])
-        res = next(client.results(search))
-        paper = {"title": res.title, "abstract": res.summary}
-        mindmap_data = vis_agent.generate_mindmap(paper)
+        meta = fetch_arxiv_meta(request.paper_id)
+        if meta is None:
+            raise HTTPException(status_code=404, detail="Paper not found on ArXiv.")
+        paper = {"title": meta["title"], "abstract": meta["abstract"]}
+        mindmap_data = _single_flight(("mindmap", request.paper_id), _mindmap_for, paper)
         return {"paper_id": request.paper_id, "mindmap": mindmap_data}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,190 +1,251 @@
 from typing import List, Dict, Any, Optional
-from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from sqlalchemy import func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, load_only, selectinload
+import asyncio
+import base64
 import datetime
-import requests
+import hashlib
+from functools import lru_cache
+import threading
+import weakref
+import httpx
+import orjson
 import logging
+from cachetools import TLRUCache, TTLCache
+from starlette.concurrency import run_in_threadpool
 
-from src.db.sql_db import get_db, UserPaper, SessionLocal
+from src.db.sql_db import get_db, get_async_db, UserPaper, Project, SessionLocal, Figures, project_papers
 from src.api.schemas import PaperActionRequest
+from src.core.arxiv_meta import fetch_arxiv_meta
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-# --- Lazy Imports / Helper Functions ---
+# Shared keep-alive HTTP/2 pool for Hugging Face calls; closed by the app lifespan
+http_client = httpx.AsyncClient(
+    http2=True,
+    timeout=10.0,
+    verify=False,  # bypass local SSL cert issues on dev machine
+    limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+)
 
-def get_pdf_downloader():
-    from src.ingestion.pdf_downloader import PDFDownloader
-    return PDFDownloader()
+# --- Helper Functions ---
 
-def get_docling_parser():
-    from src.ingestion.docling_parser import DoclingParser
-    return DoclingParser()
+def _authors(paper_info: Dict[str, Any]) -> str:
+    return ", ".join(a['name'] for a in paper_info.get('authors', ()))
 
-def get_ingestion_pipeline():
-    from src.ingestion.pipeline import IngestionPipeline
-    return IngestionPipeline()
+def _daily_paper(p: Dict[str, Any], today: str) -> Dict[str, Any]:
+    """Flatten one HF daily-papers entry into the feed's paper dict."""
+    # HF API returns dict with 'paper' key usually
+    paper_info = p.get('paper', p)
+    paper_id = paper_info['id']
+    return {
+        "id": paper_id,
+        "title": paper_info['title'],
+        "abstract": paper_info.get('ai_summary', 'No summary available.'),
+        "source": "Hugging Face Daily",
+        'thumbnail': p.get('thumbnail', ""),
+        "url": f"https://arxiv.org/abs/{paper_id}",
+        "published_date": paper_info.get('publishedAt', today),
+        "authors": _authors(paper_info),
+        "metrics": {
+            "tags": paper_info.get('ai_keywords', []),
+            "core_idea": paper_info.get('ai_summary', '')
+        },
+        "github_url": paper_info.get('githubRepo'),
+        "project_page": paper_info.get('projectPage')
+    }
 
-def fetch_daily_papers(date: str = None, limit: int = 100):
+def _search_paper(p: Dict[str, Any], today: str) -> Dict[str, Any]:
+    """Flatten one HF paper-search hit into the feed's paper dict."""
+    paper_info = p.get('paper', p)
+    paper_id = paper_info['id'] # Arxiv ID usually
+    return {
+        "id": paper_id,
+        "title": paper_info['title'],
+        "abstract": paper_info.get('summary', 'No summary available.'),
+        "source": "Hugging Face Daily",
+        "url": f"https://arxiv.org/abs/{paper_id}",
+        "published_date": paper_info.get('publishedAt', today),
+        "authors": _authors(paper_info),
+        "metrics": {"tags": paper_info.get('ai_keywords', []), "core_idea": paper_info.get('ai_summary', '')},
+        "github_url": paper_info.get('githubRepo'),
+        "project_page": paper_info.get('projectPage')
+    }
+
+async def fetch_daily_papers(date: str = None, limit: int = 100):
     # Fetch from huggingface daily papers or arxiv directly if needed
-    # For now, using huggingface daily papers API via requests
-    today = datetime.date.today()
+    today = str(datetime.date.today())
     url = "https://huggingface.co/api/daily_papers"
     if date:
         url = f"{url}?date={date}"
-    try:
-        # verify=False used to bypass local SSL cert issues on dev machine
-        resp = requests.get(url, verify=False, timeout=5)
-        resp.raise_for_status()
-        data = resp.json()
-        # Data is list of papers. Flatten/Format.
-        papers = []
-        for p in data[:limit]:
-            # HF API returns dict with 'paper' key usually
-            paper_info = p.get('paper', p)
-            papers.append({
-                "id": paper_info['id'],
-                "title": paper_info['title'],
-                "abstract": paper_info.get('ai_summary', 'No summary available.'),
-                "source": "Hugging Face Daily",
-                'thumbnail': p.get('thumbnail', ""),
-                "url": f"https://arxiv.org/abs/{paper_info['id']}",
-                "published_date": paper_info.get('publishedAt', str(today)),
-                "authors": ", ".join(
-                    [a['name'] for a in paper_info.get('authors', [])]),
-                    "metrics": {
-                        "tags": paper_info.get('ai_keywords', []),
-                        "core_idea": paper_info.get('ai_summary', '')
-                    },
-                    "github_url": paper_info.get('githubRepo'),
-                    "project_page": paper_info.get('projectPage')
-                })
-        return papers
-    except Exception as e:
-        print(f"Error fetching daily papers: {e}")
+    resp = await http_client.get(url)
+    resp.raise_for_status()
+    data = orjson.loads(resp.content)
+    # Data is list of papers. Flatten/Format.
+    return [_daily_paper(p, today) for p in data[:limit]]
+
+# (date, limit) -> parsed papers. Every /feed page for a date hits the
+# same upstream list, so it is fetched once per TTL; failures are remembered
+# briefly so an HF outage is not hammered by every request. Today's list still
+# changes during the day, past dates are effectively immutable.
+DAILY_PAPERS_TTL = 300
+DAILY_PAPERS_HISTORICAL_TTL = 86400
+DAILY_PAPERS_FAILURE_TTL = 60
+SEARCH_TTL = 600
+
+
+def _daily_papers_ttu(key, value, now):
+    date = key[0]
+    if date and date < str(datetime.date.today()):
+        return now + DAILY_PAPERS_HISTORICAL_TTL
+    return now + DAILY_PAPERS_TTL
+
+_daily_papers_cache = TLRUCache(maxsize=64, ttu=_daily_papers_ttu)
+_daily_papers_failures = TTLCache(maxsize=64, ttl=DAILY_PAPERS_FAILURE_TTL)
+# (normalized query, limit) -> parsed papers
+_search_cache = TTLCache(maxsize=256, ttl=SEARCH_TTL)
+_search_failures = TTLCache(maxsize=256, ttl=DAILY_PAPERS_FAILURE_TTL)
+_upstream_cache_lock = threading.Lock()
+# One in-flight upstream fetch per cache key; concurrent misses wait on it
+_fetch_locks: "weakref.WeakValueDictionary[tuple, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+
+async def _cached_upstream(cache, failures, key, fetch) -> List[Dict[str, Any]]:
+    """
+    Return fetch() through `cache` as a new list over the cached dicts.
+    The dicts are shared between requests and must not be mutated; see
+    _apply_user_state. A failed fetch is logged, remembered in `failures`
+    and returns [].
+    """
+    def lookup():
+        with _upstream_cache_lock:
+            return cache.get(key), key in failures
+
+    cached, failed = lookup()
+    if cached is None and not failed:
+        lock = _fetch_locks.get(key)
+        if lock is None:
+            lock = _fetch_locks[key] = asyncio.Lock()
+        async with lock:
+            cached, failed = lookup()
+            if cached is None and not failed:
+                try:
+                    papers = await fetch()
+                except Exception as e:
+                    logger.error(f"Error fetching {key}: {e}")
+                    with _upstream_cache_lock:
+                        failures[key] = True
+                    return []
+                cached = tuple(papers)
+                with _upstream_cache_lock:
+                    cache[key] = cached
+    if failed:
         return []
+    return list(cached)
+
+async def cached_fetch_daily_papers(date: str = None, limit: int = 100):
+    """fetch_daily_papers behind a TTL cache; the returned dicts are shared."""
+    return await _cached_upstream(
+        _daily_papers_cache, _daily_papers_failures, (date, limit),
+        lambda: fetch_daily_papers(date=date, limit=limit),
+    )
 
-def search_papers(query: str, limit: int = 50):
+async def _fetch_search(query: str, limit: int):
+    today = str(datetime.date.today())
+    url = "https://huggingface.co/api/papers/search"
+    resp = await http_client.get(url, params={"q": query, "limit": limit})
+    resp.raise_for_status()
+    data = orjson.loads(resp.content)
+    return [_search_paper(p, today) for p in data[:limit]]
+
+async def search_papers(query: str, limit: int = 50):
     query = query.strip()
     if not query:
-        return fetch_daily_papers(limit=limit)
-    today = datetime.date.today()
-    url = "https://huggingface.co/api/papers/search"
-    try:
-        # verify=False used to bypass local SSL cert issues on dev machine
-        resp = requests.get(url, params={"q": query, "limit": limit}, verify=False, timeout=5)
-        resp.raise_for_status()
-        data = resp.json()
-        papers = []
-        for p in data[:limit]:
-            # HF API returns dict with 'paper' key usually
-            paper_info = p.get('paper', p)
-            papers.append({
-                "id": paper_info['id'], # Arxiv ID usually
-                "title": paper_info['title'],
-                "abstract": paper_info.get('summary', 'No summary available.'),
-                "source": "Hugging Face Daily",
-                "url": f"https://arxiv.org/abs/{paper_info['id']}",
-                "published_date": paper_info.get('publishedAt', str(today)),
-                "authors": ", ".join([a['name'] for a in paper_info.get('authors', [])]),
-                "metrics": {"tags": paper_info.get('ai_keywords', []), "core_idea": paper_info.get('ai_summary', '')},
-                "github_url": paper_info.get('githubRepo'),
-                "project_page": paper_info.get('projectPage')
-            })
-        return papers
-    except Exception as e:
-        print(f"Error searching papers: {e}")
-        return []
+        return await cached_fetch_daily_papers(limit=limit)
+    return await _cached_upstream(
+        _search_cache, _search_failures, (" ".join(query.lower().split()), limit),
+        lambda: _fetch_search(query, limit),
+    )
 
 
 
-def _update_status(paper_id: str, status: str, chunk_count: int = None, pdf_path: str = None, error_message: str = None):
-    """Helper to safely update paper status in new transaction"""
-    db = SessionLocal()
-    try:
-        paper = db.query(UserPaper).filter(UserPaper.paper_id == paper_id).first()
-        if paper:
-            paper.ingestion_status = status
-            if chunk_count is not None:
-                paper.chunk_count = chunk_count
-            if pdf_path:
-                paper.pdf_path = pdf_path
-            if error_message:
-                paper.error_message = error_message
-            
-            if status == "completed":
-                paper.ingested_at = datetime.datetime.utcnow()
-                
-            db.commit()
-            logger.info(f"Updated status for {paper_id} to {status}")
-        else:
-            logger.warning(f"Could not find paper {paper_id} to update status to {status}")
-    except Exception as e:
-        logger.error(f"Failed to update status for {paper_id}: {e}")
-    finally:
-        db.close()
+# Columns the library listings read; skips notes / mindmap_json, which can be large
+_LIBRARY_COLUMNS = (
+    UserPaper.paper_id, UserPaper.title, UserPaper.summary, UserPaper.url,
+    UserPaper.published_date, UserPaper.authors, UserPaper.is_favorited,
+    UserPaper.is_saved, UserPaper.github_url, UserPaper.project_page,
+    UserPaper.ingestion_status, UserPaper.updated_at,
+)
 
-def background_ingest_paper(paper_id: str):
+def _library_query(db: Session):
+    return db.query(UserPaper).options(
+        load_only(*_LIBRARY_COLUMNS),
+        selectinload(UserPaper.projects).load_only(Project.id),
+    )
+
+@lru_cache(maxsize=4096)
+def _lowercase_tags(tags: tuple) -> frozenset:
+    """Lowercased tag set, memoized: the same papers' tags recur across searches."""
+    return frozenset(t.lower() for t in tags)
+
+def _empty_user_state() -> Dict[str, Any]:
+    return {"is_favorited": False, "is_saved": False, "project_ids": []}
+
+async def _load_user_state(db: AsyncSession) -> Dict[str, Dict[str, Any]]:
     """
-    Background task for PDF ingestion pipeline:
-    1. Download PDF from arXiv
-    2. Parse with Docling
-    3. Index with LlamaIndex into ChromaDB
+    paper_id -> user state for every paper the user has favorited, saved or
+    filed in a project. Needs no feed IDs, so it loads while HF is fetched.
     """
-    logger.info(f"Starting PDF ingestion for: {paper_id}")
-    
-    # Check if already done
-    db = SessionLocal()
-    try:
-        paper = db.query(UserPaper).filter(UserPaper.paper_id == paper_id).first()
-        if paper and paper.ingestion_status == "completed":
-            logger.info(f"Paper {paper_id} already ingested. Skipping.")
-            return
-    finally:
-        db.close()
+    # One round trip: flags and project memberships joined and aggregated in
+    # SQL. Narrow Core select, so plain tuples and no TEXT columns.
+    project_ids = func.group_concat(project_papers.c.project_id)
+    rows = await db.execute(
+        select(UserPaper.paper_id, UserPaper.is_favorited, UserPaper.is_saved, project_ids)
+        .outerjoin(project_papers, project_papers.c.paper_id == UserPaper.paper_id)
+        .where(or_(UserPaper.is_favorited, UserPaper.is_saved, project_papers.c.project_id.is_not(None)))
+        .group_by(UserPaper.paper_id)
+    )
+    return {
+        paper_id: {
+            "is_favorited": bool(fav),
+            "is_saved": bool(saved),
+            "project_ids": [int(pid) for pid in projects.split(",")] if projects else []
+        }
+        for paper_id, fav, saved, projects in rows
+    }
 
-    try:
-        # Update status to processing
-        _update_status(paper_id, "downloading")
-        
-        # Step 1: Download PDF
-        downloader = get_pdf_downloader()
-        pdf_path = downloader.download(paper_id)
-        logger.info(f"Downloaded PDF: {pdf_path}")
-        
-        # Update status
-        _update_status(paper_id, "parsing", pdf_path=str(pdf_path))
-        
-        # Step 2: Parse with Docling
-        parser = get_docling_parser()
-        parsed_doc = parser.parse(pdf_path, paper_id)
-        logger.info(f"Parsed: {len(parsed_doc.sections)} sections.")
-        
-        # Update status
-        _update_status(paper_id, "indexing")
-        
-        # Step 3: Index with LlamaIndex
-        pipeline = get_ingestion_pipeline()
-        chunk_count = pipeline.ingest(parsed_doc)
-        logger.info(f"Indexed {chunk_count} chunks for {paper_id}")
-        
-        # Update final status
-        _update_status(paper_id, "completed", chunk_count=chunk_count)
-        
-        logger.info(f"Ingestion completed for {paper_id}")
-        
-    except Exception as e:
-        logger.error(f"Ingestion failed for {paper_id}: {e}")
-        _update_status(paper_id, "failed", error_message=str(e))
+def _apply_user_state(papers: List[Dict[str, Any]], state: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Copies of papers annotated with is_favorited / is_saved / project_ids.
+    Only the returned page is copied; the cached feed dicts stay untouched.
+    """
+    return [{**p, **(state.get(p['id']) or _empty_user_state())} for p in papers]
+
+def _json_with_etag(request: Request, payload: Dict[str, Any]) -> Response:
+    """
+    JSON response tagged with a hash of its body; answers 304 when the
+    client already holds it. The body carries per-user state (favorites,
+    saves), so clients must revalidate rather than reuse it blindly.
+    """
+    body = orjson.dumps(payload)
+    etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 # --- Endpoints ---
 
 @router.get("/feed")
-def get_feed(
+async def get_feed(
+    request: Request,
     date: str = None,
     page: int = 1,
     limit: int = 50,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get daily papers feed from HuggingFace.
@@ -192,7 +253,11 @@ def get_feed(
     Supports filtering by date (YYYY-MM-DD).
     Supports pagination via page parameter (1-indexed).
     """
-    papers = fetch_daily_papers(date=date, limit=500)
+    # The upstream fetch and the user-state query are independent; overlap them
+    papers, user_state = await asyncio.gather(
+        cached_fetch_daily_papers(date=date, limit=500),
+        _load_user_state(db),
+    )
 
     # Calculate pagination
     total_papers = len(papers)
@@ -201,32 +266,24 @@ def get_feed(
     paginated_papers = papers[start_idx:end_idx]
 
     # Enrich with SQL state
-    user_papers = db.query(UserPaper).filter(
-        UserPaper.paper_id.in_([p['id'] for p in paginated_papers])).all()
-    state_map = {up.paper_id: up for up in user_papers}
-    
-    for p in paginated_papers:
-        up = state_map.get(p['id'])
-        p['is_favorited'] = up.is_favorited if up else False
-        p['is_saved'] = up.is_saved if up else False
-        p['project_ids'] = [proj.id for proj in up.projects] if up else []
-        
-    return {
+    paginated_papers = _apply_user_state(paginated_papers, user_state)
+
+    return _json_with_etag(request, {
         "papers": paginated_papers,
         "total": total_papers,
         "page": page,
         "limit": limit,
         "total_pages": (total_papers + limit - 1) // limit  # Ceiling division
-    }
+    })
 
 @router.get("/search")
-def search_papers_endpoint(
+async def search_papers_endpoint(
     q: str = Query(""),
     page: int = 1,
     limit: int = 50,
     sort: str = "date_desc",
     tags: List[str] = Query(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Search papers via Hugging Face API.
@@ -238,24 +295,24 @@ def search_papers_endpoint(
     # Fetch papers. If q is empty, search_papers("") should return latest/trending.
     # We fetch more to allow for valid filtering intersection. 
     # HF limit is 120.
-    papers = search_papers(q, limit=100)
+    papers, user_state = await asyncio.gather(
+        search_papers(q, limit=100),
+        _load_user_state(db),
+    )
     
     # 1. Collect all available tags (facets)
     all_tags = set()
     for p in papers:
-        for t in (p['metrics'].get('tags') or []):
-            all_tags.add(t)
-    sorted_tags = sorted(list(all_tags))
+        all_tags.update(p['metrics'].get('tags') or ())
+    sorted_tags = sorted(all_tags)
 
     # 2. Filter by Tags (Intersection: Paper must have ALL selected tags)
     if tags:
         required_tags = {t.lower() for t in tags}
-        filtered = []
-        for p in papers:
-             p_tags = {t.lower() for t in (p['metrics'].get('tags') or [])}
-             if required_tags.issubset(p_tags):
-                 filtered.append(p)
-        papers = filtered
+        papers = [
+            p for p in papers
+            if required_tags <= _lowercase_tags(tuple(p['metrics'].get('tags') or ()))
+        ]
 
     # 3. Sort
     if sort == "date_asc":
@@ -274,16 +331,8 @@ def search_papers_endpoint(
     paginated_papers = papers[start_idx:end_idx]
 
     # Enrich with SQL state
-    user_papers = db.query(UserPaper).filter(
-        UserPaper.paper_id.in_([p['id'] for p in paginated_papers])).all()
-    state_map = {up.paper_id: up for up in user_papers}
-    
-    for p in paginated_papers:
-        up = state_map.get(p['id'])
-        p['is_favorited'] = up.is_favorited if up else False
-        p['is_saved'] = up.is_saved if up else False
-        p['project_ids'] = [proj.id for proj in up.projects] if up else []
-        
+    paginated_papers = _apply_user_state(paginated_papers, user_state)
+
     return {
         "papers": paginated_papers,
         "total": total_papers,
@@ -293,9 +342,13 @@ def search_papers_endpoint(
         "tags": sorted_tags # Return facets
     }
 
+async def _get_user_paper(db: AsyncSession, paper_id: str) -> Optional[UserPaper]:
+    result = await db.execute(select(UserPaper).where(UserPaper.paper_id == paper_id))
+    return result.scalar_one_or_none()
+
 @router.post("/favorite")
-def toggle_favorite(action: PaperActionRequest, db: Session = Depends(get_db)):
-    paper = db.query(UserPaper).filter(UserPaper.paper_id == action.paper_id).first()
+async def toggle_favorite(action: PaperActionRequest, db: AsyncSession = Depends(get_async_db)):
+    paper = await _get_user_paper(db, action.paper_id)
     if not paper:
         paper = UserPaper(
             paper_id=action.paper_id,
@@ -308,12 +361,12 @@ def toggle_favorite(action: PaperActionRequest, db: Session = Depends(get_db)):
     else:
         paper.is_favorited = not paper.is_favorited
     
-    db.commit()
+    await db.commit()
     return {"status": "success", "is_favorited": paper.is_favorited}
 
 @router.post("/save")
-def toggle_save(action: PaperActionRequest, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
-    paper = db.query(UserPaper).filter(UserPaper.paper_id == action.paper_id).first()
+async def toggle_save(action: PaperActionRequest, db: AsyncSession = Depends(get_async_db)):
+    paper = await _get_user_paper(db, action.paper_id)
     if not paper:
         paper = UserPaper(
             paper_id=action.paper_id,
@@ -345,18 +398,20 @@ def toggle_save(action: PaperActionRequest, background_tasks: BackgroundTasks, d
             if action.mindmap_json:
                 paper.mindmap_json = action.mindmap_json
         
-    db.commit()
+    await db.commit()
     
     # Trigger ingestion if saving (and strictly if newly saved or re-saved)
     if paper.is_saved:
-        # Check if already ingested to avoid re-running
-        if paper.ingestion_status != "completed":
+        from src.ingestion.tasks import REQUEUE_STATUSES, enqueue_ingestion
+        # Never requeue a paper that is ingested or being ingested right now
+        if paper.ingestion_status in REQUEUE_STATUSES:
             # Set initial ingestion status
             paper.ingestion_status = "pending"
-            db.commit()
-            background_tasks.add_task(background_ingest_paper, action.paper_id)
+            await db.commit()
+        if paper.ingestion_status == "pending":
+            enqueue_ingestion(action.paper_id)
         else:
-            print(f"Paper {action.paper_id} already ingested. Skipping background task.")
+            print(f"Paper {action.paper_id} already {paper.ingestion_status}. Skipping background task.")
         
     return {
         "status": "success", 
@@ -367,7 +422,7 @@ def toggle_save(action: PaperActionRequest, background_tasks: BackgroundTasks, d
 @router.get("/library/saved")
 def get_saved_papers(db: Session = Depends(get_db)):
     """Get all saved papers."""
-    papers = db.query(UserPaper).filter(UserPaper.is_saved == True).order_by(UserPaper.updated_at.desc()).all()
+    papers = _library_query(db).filter(UserPaper.is_saved == True).order_by(UserPaper.updated_at.desc()).all()
     
     # Format response similar to feed
     result = []
@@ -394,7 +449,7 @@ def get_saved_papers(db: Session = Depends(get_db)):
 @router.get("/library/favorites")
 def get_favorite_papers(db: Session = Depends(get_db)):
     """Get all favorited papers."""
-    papers = db.query(UserPaper).filter(UserPaper.is_favorited == True).order_by(UserPaper.updated_at.desc()).all()
+    papers = _library_query(db).filter(UserPaper.is_favorited == True).order_by(UserPaper.updated_at.desc()).all()
     
     # Format response similar to feed
     result = []
@@ -434,6 +489,19 @@ def get_ingestion_status(paper_id: str, db: Session = Depends(get_db)):
         "ingested_at": paper.ingested_at.isoformat() if paper.ingested_at else None,
         "error_message": paper.error_message
     }
+
+@router.get("/figures/{paper_id}/{figure_id}.png")
+def get_figure(paper_id: str, figure_id: str, db: Session = Depends(get_db)):
+    """Serve a stored figure image. Chat answers link here instead of inlining base64."""
+    figure = db.get(Figures, (figure_id, paper_id))
+    if not figure or not figure.data:
+        raise HTTPException(status_code=404, detail="Figure not found")
+    return Response(
+        content=base64.b64decode(figure.data),
+        media_type="image/png",
+        headers={"Cache-Control": "public, max-age=86400"}
+    )
+
 @router.get("/insights/{paper_id}")
 async def get_paper_insights(paper_id: str, db: Session = Depends(get_db)):
     """
@@ -446,31 +514,16 @@ async def get_paper_insights(paper_id: str, db: Session = Depends(get_db)):
         # If not in DB, try to fetch from ArXiv
         logger.info(f"Paper {paper_id} not found in DB. Fetching from ArXiv...")
         try:
-            import xml.etree.ElementTree as ET
-            arxiv_url = f"http://export.arxiv.org/api/query?id_list={paper_id}"
-            response = requests.get(arxiv_url)
-            response.raise_for_status()
-            
-            # Parse ArXiv XML
-            root = ET.fromstring(response.text)
-            namespace = {'atom': 'http://www.w3.org/2005/Atom'}
-            entry = root.find('atom:entry', namespace)
-            
-            if entry:
-                title = entry.find('atom:title', namespace).text.strip()
-                summary = entry.find('atom:summary', namespace).text.strip()
-                authors = ", ".join([a.find('atom:name', namespace).text for a in entry.findall('atom:author', namespace)])
-                published = entry.find('atom:published', namespace).text
-                
+            meta = await run_in_threadpool(fetch_arxiv_meta, paper_id)
+            if meta:
                 # Save to DB
                 paper = UserPaper(
                     paper_id=paper_id,
-                    title=title,
-                    authors=authors,
-                    summary=summary,
+                    title=meta["title"],
+                    authors=meta["authors"],
+                    summary=meta["abstract"],
                     url=f"https://arxiv.org/abs/{paper_id}",
-                    published_date=published[:10],
-                    ingestion_status="pending"
+                    published_date=(meta["published"] or "")[:10] or None
                 )
                 db.add(paper)
                 db.commit()
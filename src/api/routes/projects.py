@@ -1,9 +1,10 @@
 from typing import List, Dict, Any, Optional
-from fastapi import APIRouter, HTTPException, Depends, Body, BackgroundTasks
+from fastapi import APIRouter, HTTPException, Depends, Body
 from sqlalchemy.orm import Session
 import logging
 
 from src.db.sql_db import get_db, UserPaper, Project
+from src.core.arxiv_meta import fetch_arxiv_meta
 from src.api.schemas import ProjectCreate, ProjectResponse, ProjectAddPaperRequest
 
 router = APIRouter()
@@ -86,11 +87,10 @@ def get_project(project_id: int, db: Session = Depends(get_db)):
 def add_paper_to_project(
     project_id: int, 
     request: ProjectAddPaperRequest,
-    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
 ):
     """Link a paper to a project using its paper_id (arxiv id)."""
-    from src.api.routes.papers import background_ingest_paper
+    from src.ingestion.tasks import REQUEUE_STATUSES, enqueue_ingestion
     logger.info(f"Paper details: {request}")
     
     paper_id = request.paper_id
@@ -120,21 +120,12 @@ def add_paper_to_project(
             logger.info(f"Paper {paper_id} not found in DB and no title provided. Fetching from ArXiv...")
 
         try:
-            import requests
-            import xml.etree.ElementTree as ET
-            arxiv_url = f"http://export.arxiv.org/api/query?id_list={paper_id}"
-            response = requests.get(arxiv_url)
-            response.raise_for_status()
-            
-            root = ET.fromstring(response.text)
-            namespace = {'atom': 'http://www.w3.org/2005/Atom'}
-            entry = root.find('atom:entry', namespace)
-            
-            if entry:
-                title = entry.find('atom:title', namespace).text.strip()
-                summary = entry.find('atom:summary', namespace).text.strip()
-                authors = ", ".join([a.find('atom:name', namespace).text for a in entry.findall('atom:author', namespace)])
-                published = entry.find('atom:published', namespace).text
+            meta = fetch_arxiv_meta(paper_id)
+            if meta:
+                title = meta["title"]
+                summary = meta["abstract"]
+                authors = meta["authors"]
+                published = meta["published"] or ""
                 
                 try:
                     paper = UserPaper(
@@ -190,11 +181,12 @@ def add_paper_to_project(
         project.papers.append(paper)
         db.commit()
         
-    # Trigger ingestion automatically if not completed
-    if paper.ingestion_status != "completed":
+    # Trigger ingestion automatically unless it is done or already running
+    if paper.ingestion_status in REQUEUE_STATUSES:
         paper.ingestion_status = "pending"
         db.commit()
-        background_tasks.add_task(background_ingest_paper, paper_id)
+    if paper.ingestion_status == "pending":
+        enqueue_ingestion(paper_id)
         logger.info(f"Triggered background ingestion for {paper_id} via project {project_id}")
     
     return {"message": f"Added paper '{paper.title}' to project '{project.name}' and triggered ingestion."}
@@ -0,0 +1,42 @@
+import logging
+import threading
+from typing import Any, Dict, Optional
+from cachetools import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# arxiv_id -> metadata. Saving, generating ideas and visualizing the same
+# paper would otherwise each fetch the same arXiv entry.
+ARXIV_META_TTL = 24 * 3600
+_cache = TTLCache(maxsize=10_000, ttl=ARXIV_META_TTL)
+_lock = threading.Lock()
+
+
+def fetch_arxiv_meta(arxiv_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Title, abstract, authors and publication date of an arXiv paper.
+    Returns None when arXiv has no such entry; network errors propagate.
+    """
+    with _lock:
+        cached = _cache.get(arxiv_id)
+    if cached is not None:
+        return cached
+
+    import arxiv
+    # Built per call like fetch_arxiv_papers: the client's rate-limit
+    # bookkeeping is not safe to share across threads, and a shared one
+    # would serialize concurrent misses. A single id fits in one page.
+    client = arxiv.Client(page_size=1)
+    res = next(client.results(arxiv.Search(id_list=[arxiv_id])), None)
+    if res is None:
+        return None
+    meta = {
+        "title": res.title,
+        "abstract": res.summary,
+        "authors": ", ".join(author.name for author in res.authors),
+        "published": res.published.isoformat() if res.published else None,
+    }
+    with _lock:
+        _cache[arxiv_id] = meta
+    logger.debug(f"Fetched arXiv metadata for {arxiv_id}")
+    return meta
@@ -5,18 +5,27 @@ from functools import lru_cache
 class Settings(BaseSettings):
     APP_NAME: str = "Shodh"
     API_V1_STR: str = "/api/v1"
+    # Public origin of this API, used for links embedded in answers (e.g. figures)
+    API_BASE_URL: str = "http://localhost:8000"
+    # Browser origin(s) of the frontend allowed by CORS, comma-separated
+    FRONTEND_URL: str = "http://localhost:3000"
     
     # LLM Configuration
     OPENAI_API_KEY: str | None = None
     GEMINI_API_KEY: str | None = None
     OLLAMA_BASE_URL: str = "http://localhost:11434"
     OLLAMA_MODEL: str = "qwen2.5:7b"
+    # How long Ollama keeps the model (and its prompt KV cache) loaded between calls
+    OLLAMA_KEEP_ALIVE: str = "30m"
+    # Context window for crew agents; must fit the shared paper prefix plus retrieved evidence
+    OLLAMA_NUM_CTX: int = 8192
     
     # Vector DB
     VECTOR_DB_PATH: str = "./chroma_db"
     COLLECTION_NAME: str = "research_papers"
     VECTOR_DB_HOST: str | None = None
     VECTOR_DB_PORT: int = 8000
+    CHROMA_BATCH_SIZE: int = 128  # nodes per collection.add during ingestion
     
     # HuggingFace
     HF_TOKEN: str | None = None
@@ -51,6 +60,31 @@ class Settings(BaseSettings):
     DOCLING_VLM_API_URL: str = "http://localhost:11434/v1/chat/completions"
     DOCLING_VLM_API_KEY: str | None = None
     DOCLING_VLM_PROMPT: str = "Convert this page to markdown."
+    DOCLING_BACKEND: str = "pypdfium"  # pypdfium, docling_parse
+    DOCLING_DO_OCR: bool = False  # arXiv PDFs carry a text layer
+    # Page ranges converted in parallel worker processes (each loads its own models)
+    DOCLING_PAGES_PER_WORKER: int = 8
+    DOCLING_MAX_WORKERS: int = 4
+    # Shorter papers are converted whole, in-process
+    DOCLING_PARALLEL_MIN_PAGES: int = 24
+    # Papers ingested concurrently, outside the request threadpool
+    INGESTION_WORKERS: int = 2
+    # local: ingest in the API process; worker: leave pending papers to
+    # a separate `python -m src.ingestion.tasks` process
+    INGESTION_MODE: str = "local"
+
+    # Max in-flight LLM calls for batch agents (e.g. MetricsAgent.run)
+    LLM_CONCURRENCY: int = 8
+
+    # LLM output cache (content-hash keyed, on disk)
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_DIR: str = "./.llm_cache"
+    LLM_CACHE_TTL: int = 7 * 24 * 3600  # seconds, 0 = never expire
+
+    # Semantic cache for mindmaps / ideas (near-duplicate papers by embedding)
+    SEMANTIC_CACHE_ENABLED: bool = True
+    SEMANTIC_CACHE_COLLECTION: str = "semantic_cache"
+    SEMANTIC_CACHE_THRESHOLD: float = 0.97  # cosine similarity
 
     # CHROMA_PERSIST_PATH is removed in favor of VECTOR_DB_PATH
 
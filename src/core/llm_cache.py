@@ -0,0 +1,45 @@
+import hashlib
+import logging
+from typing import Any, Optional
+from src.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+_cache = None
+
+
+def get_llm_cache():
+    """
+    Lazily open the on-disk LLM output cache.
+    Returns None when caching is disabled in settings.
+    """
+    global _cache
+    settings = get_settings()
+    if not settings.LLM_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        import diskcache
+        _cache = diskcache.Cache(settings.LLM_CACHE_DIR)
+        logger.info(f"LLM output cache opened at {settings.LLM_CACHE_DIR}")
+    return _cache
+
+
+def make_key(namespace: str, *parts: str) -> str:
+    """Content-hash key: sha256 over the NUL-joined parts."""
+    digest = hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+    return f"{namespace}:{digest}"
+
+
+def cache_get(key: str) -> Optional[Any]:
+    cache = get_llm_cache()
+    if cache is None:
+        return None
+    return cache.get(key)
+
+
+def cache_set(key: str, value: Any) -> None:
+    cache = get_llm_cache()
+    if cache is None:
+        return
+    ttl = get_settings().LLM_CACHE_TTL
+    cache.set(key, value, expire=ttl or None)
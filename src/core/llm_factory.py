@@ -1,5 +1,5 @@
 import logging
-from typing import Optional, Any
+from typing import Optional, Any, Callable, Dict, Iterator, List, Tuple
 from src.core.config import get_settings
 
 logger = logging.getLogger(__name__)
@@ -18,9 +18,35 @@ class LLMFactory:
     def get_embedding_provider() -> str:
         return get_settings().EMBEDDING_PROVIDER
 
+    # LlamaIndex clients keyed by (kind, model name); dropped when settings reload.
+    # Every agent and retriever asking for the same model shares one client
+    # and therefore one HTTP connection pool.
+    _client_cache: Dict[Tuple[str, Optional[str]], Any] = {}
+    _client_cache_settings = None
+
+    @classmethod
+    def _memoized(cls, kind: str, model_name: Optional[str], build: Callable[[Optional[str]], Any]):
+        settings = get_settings()
+        if cls._client_cache_settings is not settings:
+            cls._client_cache.clear()
+            cls._client_cache_settings = settings
+
+        key = (kind, model_name)
+        client = cls._client_cache.get(key)
+        if client is None:
+            client = build(model_name)
+            if client is not None:
+                cls._client_cache[key] = client
+        return client
+
     @classmethod
     def get_llama_index_llm(cls, model_name: Optional[str] = None):
-        """Get LlamaIndex compatible LLM"""
+        """Get LlamaIndex compatible LLM (memoized per model until settings change)"""
+        return cls._memoized("llm", model_name, cls._create_llama_index_llm)
+
+    @classmethod
+    def _create_llama_index_llm(cls, model_name: Optional[str] = None):
+        """Build a new LlamaIndex compatible LLM"""
         provider = cls.get_llm_provider()
         settings = get_settings()
         
@@ -31,7 +57,8 @@ class LLMFactory:
                     model=model_name or settings.OLLAMA_MODEL,
                     base_url=settings.OLLAMA_BASE_URL,
                     temperature=0.7,
-                    request_timeout=120.0
+                    request_timeout=120.0,
+                    keep_alive=settings.OLLAMA_KEEP_ALIVE
                 )
             elif provider == "openai":
                 from llama_index.llms.openai import OpenAI
@@ -62,7 +89,12 @@ class LLMFactory:
 
     @classmethod
     def get_llama_index_embedding(cls, model_name: Optional[str] = None):
-        """Get LlamaIndex compatible Embedding model"""
+        """Get LlamaIndex compatible Embedding model (memoized like the LLM)"""
+        return cls._memoized("embedding", model_name, cls._create_llama_index_embedding)
+
+    @classmethod
+    def _create_llama_index_embedding(cls, model_name: Optional[str] = None):
+        """Build a new LlamaIndex compatible Embedding model"""
         provider = cls.get_embedding_provider()
         settings = get_settings()
         
@@ -103,48 +135,93 @@ class LLMFactory:
             logger.error(f"Failed to import embedding provider {provider}: {e}")
             raise
 
+    # HTTP sessions handed to LiteLLM (which backs CrewAI's LLM) so every crew
+    # LLM call reuses pooled keep-alive connections
+    _http_client = None
+    _async_http_client = None
+
     @classmethod
-    def get_crew_llm(cls, model_name: str) -> Any:
-        """Get CrewAI compatible LLM"""
+    def _share_http_sessions(cls):
+        if cls._http_client is not None:
+            return
+        import atexit
+        import httpx
+        import litellm
+
+        limits = httpx.Limits(max_keepalive_connections=10, max_connections=20)
+        timeout = httpx.Timeout(120.0, connect=5.0)
+        cls._http_client = httpx.Client(limits=limits, timeout=timeout)
+        cls._async_http_client = httpx.AsyncClient(limits=limits, timeout=timeout)
+        litellm.client_session = cls._http_client
+        litellm.aclient_session = cls._async_http_client
+        atexit.register(cls._http_client.close)
+
+    @classmethod
+    def _crew_llm_params(cls, model_name: str, **params) -> Dict[str, Any]:
+        """LiteLLM arguments for a crew model: provider-prefixed name, endpoint and options"""
         provider = cls.get_llm_provider()
         settings = get_settings()
-        
-        # CrewAI's LLM class wraps LiteLLM, so we just need to pass the correct string identifier and params
+        options = {"temperature": 0.1, **params}
         
         if provider == "ollama":
-            from crewai import LLM
-            return LLM(
+            return dict(
                 model=f"ollama/{model_name}",
                 api_base=settings.OLLAMA_BASE_URL,
-                temperature=0.1,
-                num_ctx=4096
+                num_ctx=settings.OLLAMA_NUM_CTX,
+                keep_alive=settings.OLLAMA_KEEP_ALIVE,
+                **options
             )
         elif provider == "openai":
-            from crewai import LLM
             # model_name here might need adjustment if passed from config defaulting to "qwen"
             # If provider is OpenAI, we ignore the passed `model_name` if it looks like an ollama model,
             # OR we expect the user to have set CREW_LLM_SMALL/LARGE correctly in config.
             # Assuming config is correct for the provider.
-            return LLM(
+            return dict(
                 model=f"openai/{model_name}",
                 api_key=settings.OPENAI_API_KEY,
-                temperature=0.1
+                **options
             )
         elif provider == "azure_openai":
-            from crewai import LLM
-            return LLM(
+            return dict(
                 model=f"azure/{model_name}", # Typically acts as deployment name
                 api_key=settings.AZURE_OPENAI_API_KEY,
                 api_base=settings.AZURE_OPENAI_ENDPOINT,
                 api_version=settings.AZURE_OPENAI_API_VERSION,
-                temperature=0.1
+                **options
             )
         elif provider == "gemini":
-            from crewai import LLM
-            return LLM(
+            return dict(
                 model=f"gemini/{model_name}",
                 api_key=settings.GEMINI_API_KEY,
-                temperature=0.1
+                **options
             )
+        else:
+            raise ValueError(f"Unknown LLM provider: {provider}")
 
+    @classmethod
+    def get_crew_llm(cls, model_name: str, **params) -> Any:
+        """
+        Get CrewAI compatible LLM.
+        Extra params (e.g. response_format, max_tokens) are passed through to
+        LiteLLM, which maps them to each provider's equivalent.
+        """
+        # CrewAI's LLM class wraps LiteLLM, so we just need to pass the correct string identifier and params
+        from crewai import LLM
+        cls._share_http_sessions()
+        return LLM(**cls._crew_llm_params(model_name, **params))
 
+    @classmethod
+    def stream_crew_llm(cls, model_name: str, messages: List[Dict[str, str]], **params) -> Iterator[str]:
+        """
+        Stream a chat completion with exactly the settings get_crew_llm would
+        use for the same model and params, yielding text deltas.
+        """
+        import litellm
+        cls._share_http_sessions()
+        response = litellm.completion(
+            messages=messages, stream=True, **cls._crew_llm_params(model_name, **params)
+        )
+        for chunk in response:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                yield delta
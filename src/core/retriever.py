@@ -1,9 +1,74 @@
+import asyncio
 import logging
+import threading
 from typing import List, Optional, Any, Dict, Union
+from cachetools import LRUCache
 from src.core.config import get_settings
 
 logger = logging.getLogger(__name__)
 
+# (embedding model, text) -> query embedding. A chat turn embeds the same
+# question several times (citation search, then the crew's own searches).
+_QUERY_EMBEDDINGS = LRUCache(maxsize=1024)
+_QUERY_EMBEDDINGS_LOCK = threading.Lock()
+
+
+def _embedding_key(embed_model, text: str):
+    return type(embed_model).__name__, getattr(embed_model, "model_name", None), text
+
+
+def _cached_embeddings(embed_model, texts: List[str]):
+    """(embeddings with None for misses, indexes of the misses)"""
+    with _QUERY_EMBEDDINGS_LOCK:
+        embeddings = [_QUERY_EMBEDDINGS.get(_embedding_key(embed_model, t)) for t in texts]
+    return embeddings, [i for i, e in enumerate(embeddings) if e is None]
+
+
+def _remember_embeddings(embed_model, embeddings, texts: List[str], misses: List[int], fresh):
+    with _QUERY_EMBEDDINGS_LOCK:
+        for i, embedding in zip(misses, fresh):
+            embeddings[i] = embedding
+            _QUERY_EMBEDDINGS[_embedding_key(embed_model, texts[i])] = embedding
+    return embeddings
+
+
+def _embed_uncached(embed_model, texts: List[str]) -> List[List[float]]:
+    if len(texts) == 1:
+        return [embed_model.get_query_embedding(texts[0])]
+    # OllamaEmbedding exposes a raw batch call (/api/embed); apply its query
+    # prefix ourselves since the batch API would use the document prefix
+    if hasattr(embed_model, "get_general_text_embeddings"):
+        prefix = getattr(embed_model, "query_instruction", None) or ""
+        return embed_model.get_general_text_embeddings([f"{prefix}{t}" for t in texts])
+    return [embed_model.get_query_embedding(t) for t in texts]
+
+
+async def _aembed_uncached(embed_model, texts: List[str]) -> List[List[float]]:
+    if len(texts) == 1:
+        return [await embed_model.aget_query_embedding(texts[0])]
+    if hasattr(embed_model, "aget_general_text_embeddings"):
+        prefix = getattr(embed_model, "query_instruction", None) or ""
+        return await embed_model.aget_general_text_embeddings([f"{prefix}{t}" for t in texts])
+    return list(await asyncio.gather(*(embed_model.aget_query_embedding(t) for t in texts)))
+
+
+def embed_queries(embed_model, texts: List[str]) -> List[List[float]]:
+    """Query embeddings for several texts; cached ones are reused, the rest embedded in one request where the model allows it."""
+    embeddings, misses = _cached_embeddings(embed_model, texts)
+    if not misses:
+        return embeddings
+    fresh = _embed_uncached(embed_model, [texts[i] for i in misses])
+    return _remember_embeddings(embed_model, embeddings, texts, misses, fresh)
+
+
+async def aembed_queries(embed_model, texts: List[str]) -> List[List[float]]:
+    """Async embed_queries()."""
+    embeddings, misses = _cached_embeddings(embed_model, texts)
+    if not misses:
+        return embeddings
+    fresh = await _aembed_uncached(embed_model, [texts[i] for i in misses])
+    return _remember_embeddings(embed_model, embeddings, texts, misses, fresh)
+
 class PaperRetriever:
     """
     Paper retrieval logic using LlamaIndex.
@@ -47,6 +112,27 @@ class PaperRetriever:
         from src.core.llm_factory import LLMFactory
         return LLMFactory.get_llama_index_embedding(model_name=self.embedding_model)
 
+    @staticmethod
+    def _build_filters(paper_id: Optional[Any]):
+        from llama_index.core.vector_stores import MetadataFilters, MetadataFilter
+
+        if not paper_id:
+            return None
+        if isinstance(paper_id, list):
+            return MetadataFilters(filters=[
+                MetadataFilter(key="paper_id", value=paper_id, operator="in")
+            ])
+        return MetadataFilters(filters=[
+            MetadataFilter(key="paper_id", value=paper_id)
+        ])
+
+    @staticmethod
+    def _to_results(nodes) -> List[dict]:
+        return [
+            {"content": node.text, "score": node.score, "metadata": node.metadata}
+            for node in nodes
+        ]
+
     def query(
         self,
         query_text: str,
@@ -61,39 +147,22 @@ class PaperRetriever:
             paper_id: Optional string (single paper) or list of strings (multiple papers)
             top_k: Number of results
         """
-        from llama_index.core import VectorStoreIndex
-        from llama_index.core.vector_stores import MetadataFilters, MetadataFilter
+        from llama_index.core import QueryBundle, VectorStoreIndex
         
+        embed_model = self._get_embed_model()
         index = VectorStoreIndex.from_vector_store(
             self._get_vector_store(),
-            embed_model=self._get_embed_model()
+            embed_model=embed_model
         )
         
-        filters = None
-        if paper_id:
-            if isinstance(paper_id, list):
-                filters = MetadataFilters(filters=[
-                    MetadataFilter(key="paper_id", value=paper_id, operator="in")
-                ])
-            else:
-                filters = MetadataFilters(filters=[
-                    MetadataFilter(key="paper_id", value=paper_id)
-                ])
-        
         retriever = index.as_retriever(
             similarity_top_k=top_k,
-            filters=filters
+            filters=self._build_filters(paper_id)
         )
         
-        nodes = retriever.retrieve(query_text)
-        results = []
-        for node in nodes:
-            results.append({
-                "content": node.text,
-                "score": node.score,
-                "metadata": node.metadata
-            })
-        return results
+        embedding = embed_queries(embed_model, [query_text])[0]
+        nodes = retriever.retrieve(QueryBundle(query_str=query_text, embedding=embedding))
+        return self._to_results(nodes)
 
     async def aquery(
         self,
@@ -104,39 +173,53 @@ class PaperRetriever:
         """
         Async query the vector store for relevant chunks.
         """
-        from llama_index.core import VectorStoreIndex
-        from llama_index.core.vector_stores import MetadataFilters, MetadataFilter
+        from llama_index.core import QueryBundle, VectorStoreIndex
         
+        embed_model = self._get_embed_model()
         index = VectorStoreIndex.from_vector_store(
             self._get_vector_store(),
-            embed_model=self._get_embed_model()
+            embed_model=embed_model
         )
         
-        filters = None
-        if paper_id:
-            if isinstance(paper_id, list):
-                filters = MetadataFilters(filters=[
-                    MetadataFilter(key="paper_id", value=paper_id, operator="in")
-                ])
-            else:
-                filters = MetadataFilters(filters=[
-                    MetadataFilter(key="paper_id", value=paper_id)
-                ])
-        
         retriever = index.as_retriever(
             similarity_top_k=top_k,
-            filters=filters
+            filters=self._build_filters(paper_id)
         )
         
-        nodes = await retriever.aretrieve(query_text)
-        results = []
-        for node in nodes:
-            results.append({
-                "content": node.text,
-                "score": node.score,
-                "metadata": node.metadata
-            })
-        return results
+        embedding = (await aembed_queries(embed_model, [query_text]))[0]
+        nodes = await retriever.aretrieve(QueryBundle(query_str=query_text, embedding=embedding))
+        return self._to_results(nodes)
+
+    def query_batch(
+        self,
+        query_texts: List[str],
+        paper_id: Optional[Any] = None,
+        top_k: int = 5
+    ) -> List[List[dict]]:
+        """
+        Query the vector store for several queries at once.
+        All query embeddings are computed in a single embedding call; only the
+        (local) vector lookups run per query. Results are in input order.
+        """
+        from llama_index.core import QueryBundle, VectorStoreIndex
+
+        if not query_texts:
+            return []
+        embed_model = self._get_embed_model()
+        index = VectorStoreIndex.from_vector_store(
+            self._get_vector_store(),
+            embed_model=embed_model
+        )
+        retriever = index.as_retriever(
+            similarity_top_k=top_k,
+            filters=self._build_filters(paper_id)
+        )
+
+        embeddings = embed_queries(embed_model, query_texts)
+        return [
+            self._to_results(retriever.retrieve(QueryBundle(query_str=text, embedding=embedding)))
+            for text, embedding in zip(query_texts, embeddings)
+        ]
 
     def get_query_engine(self, paper_id: str):
         """
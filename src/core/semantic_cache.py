@@ -0,0 +1,90 @@
+import logging
+import threading
+import uuid
+from typing import Any, List, Optional, Tuple
+import orjson
+from src.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+_collection = None
+_lock = threading.Lock()
+
+
+def _get_collection():
+    """
+    Lazily open the Chroma collection backing the cache.
+    Returns None when the semantic cache is disabled in settings.
+    """
+    global _collection
+    settings = get_settings()
+    if not settings.SEMANTIC_CACHE_ENABLED:
+        return None
+    with _lock:
+        if _collection is None:
+            from src.db.vector_store import get_chroma_client
+            # Cosine space, so 1 - distance is the similarity; Chroma's HNSW
+            # index keeps lookups sub-linear as the cache grows
+            _collection = get_chroma_client(settings).get_or_create_collection(
+                name=settings.SEMANTIC_CACHE_COLLECTION,
+                metadata={"hnsw:space": "cosine"}
+            )
+            logger.info(f"Semantic cache opened ({settings.SEMANTIC_CACHE_COLLECTION})")
+    return _collection
+
+
+def paper_text(paper: dict) -> str:
+    """The text a paper is cached under: title + abstract."""
+    return f"{paper.get('title') or ''}\n\n{paper.get('abstract') or ''}"
+
+
+def _embed(text: str) -> List[float]:
+    from src.core.llm_factory import LLMFactory
+    return LLMFactory.get_llama_index_embedding().get_text_embedding(text)
+
+
+def lookup(namespace: str, text: str) -> Tuple[Optional[Any], Optional[List[float]]]:
+    """
+    Nearest cached value for `text` within `namespace`, if its cosine
+    similarity clears SEMANTIC_CACHE_THRESHOLD. Also returns the embedding
+    so a miss can be stored without embedding twice.
+    """
+    collection = _get_collection()
+    if collection is None:
+        return None, None
+    try:
+        embedding = _embed(text)
+        if collection.count() == 0:
+            return None, embedding
+        result = collection.query(
+            query_embeddings=[embedding],
+            n_results=1,
+            where={"namespace": namespace},
+            include=["documents", "distances"]
+        )
+    except Exception as e:
+        logger.warning(f"Semantic cache lookup failed: {e}")
+        return None, None
+
+    if result["ids"] and result["ids"][0]:
+        similarity = 1.0 - result["distances"][0][0]
+        if similarity >= get_settings().SEMANTIC_CACHE_THRESHOLD:
+            logger.info(f"Semantic cache hit ({namespace}, similarity={similarity:.3f})")
+            return orjson.loads(result["documents"][0][0]), embedding
+    return None, embedding
+
+
+def store(namespace: str, embedding: Optional[List[float]], value: Any) -> None:
+    """Cache `value` under the embedding returned by lookup()."""
+    collection = _get_collection()
+    if collection is None or embedding is None:
+        return
+    try:
+        collection.add(
+            ids=[uuid.uuid4().hex],
+            embeddings=[embedding],
+            documents=[orjson.dumps(value).decode()],
+            metadatas=[{"namespace": namespace}]
+        )
+    except Exception as e:
+        logger.warning(f"Semantic cache store failed: {e}")
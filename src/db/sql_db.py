@@ -1,13 +1,31 @@
-from sqlalchemy import create_engine, Column, String, Integer, DateTime, Boolean, Text, Table, ForeignKey, func
+from sqlalchemy import create_engine, Column, String, Integer, DateTime, Boolean, Text, Table, ForeignKey, Index, func
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from datetime import datetime
+from functools import lru_cache
 
 # SQLite database
 DATABASE_URL = "sqlite:///./shodh.db"
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+# Pooled connections are reused across requests and crew worker threads
+engine = create_engine(
+    DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    pool_size=20,
+    pool_pre_ping=True
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Async engine for request handlers, so queries don't tie up threadpool workers.
+# Same database file; background jobs and crews keep the sync engine above.
+async_engine = create_async_engine(
+    DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1),
+    pool_size=10,
+    max_overflow=20,
+    pool_pre_ping=True
+)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 Base = declarative_base()
 
 class UserPaper(Base):
@@ -58,6 +76,12 @@ class Conversation(Base):
     # Relationships
     project = relationship("Project", backref="conversations")
 
+    # Conversation lists filter by paper/project and sort newest first
+    __table_args__ = (
+        Index("ix_conv_paper_updated", "paper_id", updated_at.desc()),
+        Index("ix_conv_project_updated", "project_id", updated_at.desc()),
+    )
+
 
 class Message(Base):
     """Stores individual messages within a conversation."""
@@ -71,6 +95,11 @@ class Message(Base):
     mode = Column(String, nullable=True)  # 'agent' or 'contextual'
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    # A conversation's messages are always read in order
+    __table_args__ = (
+        Index("ix_message_conv_created", "conversation_id", "created_at"),
+    )
+
 
 class PaperStructure(Base):
     """Stores paper outline."""
@@ -111,8 +140,15 @@ class Project(Base):
     # Relationship to papers via association table
     papers = relationship("UserPaper", secondary=project_papers, backref="projects")
 
+@lru_cache(maxsize=1)
 def init_db():
+    """Create missing tables and indexes; runs once per process however often it's called."""
     Base.metadata.create_all(bind=engine)
+    # create_all skips tables that already exist, so indexes added to an
+    # existing table later are created here
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
 
 def get_db():
     db = SessionLocal()
@@ -120,3 +156,7 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db() -> AsyncSession:
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -4,13 +4,17 @@ Extracts structured content including sections, tables, and figures.
 """
 import re
 import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import repeat
 from pathlib import Path
 from typing import Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass, field
 
 import time
 
-from docling_core.types.doc import ImageRefMode, PictureItem, TableItem
+from docling_core.types.doc import DoclingDocument, ImageRefMode, PictureItem, TableItem
 
 from docling.datamodel.base_models import InputFormat
 from docling.datamodel.pipeline_options import PdfPipelineOptions
@@ -33,6 +37,47 @@ logger = logging.getLogger(__name__)
 
 # db = SessionLocal()  <-- Removed global session
 
+_page_pool = None
+
+
+def _get_page_pool() -> ProcessPoolExecutor:
+    """
+    Worker processes for Docling conversions. Spawned rather than forked,
+    since the parent runs ingestion threads; workers stay up so their
+    models are loaded once, not once per paper.
+    """
+    global _page_pool
+    if _page_pool is None:
+        _page_pool = ProcessPoolExecutor(
+            max_workers=get_settings().DOCLING_MAX_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _page_pool
+
+
+@lru_cache(maxsize=1)
+def _get_converter() -> DocumentConverter:
+    """Per-process Docling converter, built on first use in each worker."""
+    format_options = DoclingParser()._build_format_options(get_settings())
+    return DocumentConverter(format_options=format_options)
+
+
+def _page_count(pdf_path: Path) -> int:
+    import pypdfium2
+    pdf = pypdfium2.PdfDocument(str(pdf_path))
+    try:
+        return len(pdf)
+    finally:
+        pdf.close()
+
+
+def _convert_page_range(pdf_path: str, page_range: Tuple[int, int]) -> DoclingDocument:
+    """Convert pages page_range (1-based, inclusive) to a DoclingDocument."""
+    start_time = time.time()
+    conv_res = _get_converter().convert(Path(pdf_path), page_range=page_range)
+    logger.info(f"Docling conversion time for pages {page_range[0]}-{page_range[1]}: {time.time() - start_time:.2f}s")
+    return conv_res.document
+
 
 @dataclass
 class Figure:
@@ -177,37 +222,62 @@ class DoclingParser:
                 )
              }
         else:
-             logger.info("Using Standard PDF Pipeline")
+             logger.info(f"Using Standard PDF Pipeline with {settings.DOCLING_BACKEND} backend")
              pipeline_options = PdfPipelineOptions()
              pipeline_options.images_scale = 2.0
              pipeline_options.generate_page_images = True
              pipeline_options.generate_picture_images = True
+             pipeline_options.do_ocr = settings.DOCLING_DO_OCR
+             pipeline_options.do_table_structure = True
+
+             format_option_kwargs = {}
+             if settings.DOCLING_BACKEND == "pypdfium":
+                 # Roughly 2x faster and lighter than docling-parse on text PDFs
+                 from docling.backend.pypdfium2_backend import PyPdfiumDocumentBackend
+                 format_option_kwargs["backend"] = PyPdfiumDocumentBackend
+             elif settings.DOCLING_BACKEND != "docling_parse":
+                 raise ValueError(f"Unknown Docling backend: {settings.DOCLING_BACKEND}")
 
              format_options = {
                 InputFormat.PDF: PdfFormatOption(
-                    pipeline_options=pipeline_options
+                    pipeline_options=pipeline_options,
+                    **format_option_kwargs
                 )
              }
         return format_options
 
-    def _docling_parse(self, input_doc_path):
-        # Use project-relative scratch directory
-        output_dir = Path("./data/scratch")
+    def _docling_parse(self, input_doc_path) -> str:
+        """
+        Convert a PDF to markdown with embedded figures.
+
+        Papers shorter than DOCLING_PARALLEL_MIN_PAGES are converted whole in
+        this process. Longer ones are split into DOCLING_PAGES_PER_WORKER-page
+        ranges converted in parallel worker processes, and the resulting
+        DoclingDocuments are concatenated in page order before export. Layout
+        is analysed per range, so a paragraph or table that crosses a range
+        boundary comes out as two items; that is the price of the speedup.
+        """
         settings = get_settings()
-        format_options = self._build_format_options(settings)
-
-        doc_converter = DocumentConverter(
-            format_options=format_options
-        )
         input_doc_path = Path(input_doc_path)
-        doc_filename = input_doc_path.stem
-        
+        page_count = _page_count(input_doc_path)
+
         start_time = time.time()
-        conv_res = doc_converter.convert(input_doc_path)
+        if page_count < settings.DOCLING_PARALLEL_MIN_PAGES:
+            page_ranges = [(1, page_count)]
+            document = _get_converter().convert(input_doc_path).document
+        else:
+            per_worker = max(1, settings.DOCLING_PAGES_PER_WORKER)
+            page_ranges = [
+                (start, min(start + per_worker - 1, page_count))
+                for start in range(1, page_count + 1, per_worker)
+            ]
+            parts = _get_page_pool().map(_convert_page_range, repeat(str(input_doc_path)), page_ranges)
+            document = DoclingDocument.concatenate(list(parts))
+        markdown = document.export_to_markdown(image_mode=ImageRefMode.EMBEDDED)
         end_time = time.time() - start_time
-        logger.info(f"Docling conversion time: {end_time:.2f}s")
-        
-        return conv_res
+        logger.info(f"Docling conversion time: {end_time:.2f}s ({page_count} pages, {len(page_ranges)} ranges)")
+
+        return markdown
 
     def scan_markdown_structure(self, md_path: str):
         """
@@ -409,10 +479,10 @@ class DoclingParser:
         try:
             # Convert PDF to MD using Docling
             logger.info("parisng via docling....")
-            result = self._docling_parse(pdf_path)
+            markdown = self._docling_parse(pdf_path)
             out_path = parent.joinpath(f"{pdf_path.stem}.md")
-            result.document.save_as_markdown(parent.joinpath(f"{pdf_path.stem}.md"), image_mode=ImageRefMode.EMBEDDED)
-            logger.info(f"parsed md save at: {parent.joinpath(f"{pdf_path.stem}.md")}....")
+            out_path.write_text(markdown, encoding="utf-8")
+            logger.info(f"parsed md save at: {out_path}....")
             paper_ir = self.scan_markdown_structure(out_path)
             structure = "\n".join(list(paper_ir.keys()))
             # Create local session for this parsing task
@@ -4,13 +4,20 @@ Downloads PDFs to local storage for ingestion.
 """
 import os
 import re
-import requests
+import httpx
 from pathlib import Path
 from typing import Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Shared by every download so connections to arxiv.org are kept alive
+_HTTP = httpx.Client(
+    timeout=httpx.Timeout(60.0, connect=10.0),
+    follow_redirects=True,
+    limits=httpx.Limits(max_connections=8, max_keepalive_connections=4)
+)
+
 # Default storage location
 PDF_STORAGE_PATH = Path("/Users/abhyuday/Downloads/shodh_papers")
 
@@ -74,23 +81,23 @@ class PDFDownloader:
         logger.info(f"Downloading PDF from {url}")
         
         try:
-            response = requests.get(url, timeout=60, stream=True)
-            response.raise_for_status()
-            
-            # Verify it's actually a PDF
-            content_type = response.headers.get('content-type', '')
-            if 'pdf' not in content_type.lower() and not url.endswith('.pdf'):
-                raise RuntimeError(f"Response is not a PDF: {content_type}")
-            
-            # Write to file
-            with open(pdf_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
+            with _HTTP.stream("GET", url) as response:
+                response.raise_for_status()
+
+                # Verify it's actually a PDF
+                content_type = response.headers.get('content-type', '')
+                if 'pdf' not in content_type.lower() and not url.endswith('.pdf'):
+                    raise RuntimeError(f"Response is not a PDF: {content_type}")
+
+                # Write to file
+                with open(pdf_path, 'wb') as f:
+                    for chunk in response.iter_bytes(chunk_size=65536):
+                        f.write(chunk)
             
             logger.info(f"Downloaded PDF to {pdf_path}")
             return pdf_path
             
-        except requests.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"Failed to download PDF: {e}")
             raise RuntimeError(f"PDF download failed: {e}")
     
@@ -32,6 +32,7 @@ class PaperIngestionPipeline:
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
         self.chroma_persist_path = chroma_persist_path or settings.VECTOR_DB_PATH
+        self.batch_size = settings.CHROMA_BATCH_SIZE
         
         self._pipeline = None
         self._vector_store = None
@@ -74,7 +75,6 @@ class PaperIngestionPipeline:
                 # Step 3: Generate embeddings
                 self._get_embed_model(),
             ],
-            vector_store=self._get_vector_store(),
         )
     
     def _parsed_doc_to_documents(self, parsed_doc: PaperDocument) -> List:
@@ -147,8 +147,13 @@ class PaperIngestionPipeline:
         # Build and run the pipeline
         pipeline = self._build_pipeline()
         
-        # Run pipeline - automatically stores in vector store
         nodes = pipeline.run(documents=documents, show_progress=True)
+
+        # Store in fixed-size batches: bounded payloads per collection.add,
+        # instead of a single call carrying every node of the paper
+        vector_store = self._get_vector_store()
+        for start in range(0, len(nodes), self.batch_size):
+            vector_store.add(nodes[start:start + self.batch_size])
         
         logger.info(f"Ingested {len(nodes)} nodes for {parsed_doc.paper_id}")
         return len(nodes)
@@ -0,0 +1,228 @@
+"""
+Paper ingestion jobs, run off the API request path.
+
+The ingestion_status column is the queue: a saved or project paper
+marked "pending" is waiting, and a worker claims it by moving it to
+"downloading". Papers only previewed (e.g. via /insights) have no status
+and are never ingested.
+
+With INGESTION_MODE="local", enqueue_ingestion() hands a paper to a small
+dedicated pool in the API process, so a long download/parse never occupies
+the threads FastAPI uses for requests. With INGESTION_MODE="worker" the API
+only marks papers pending and a separate process picks them up:
+
+    python -m src.ingestion.tasks
+"""
+import datetime
+import logging
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import List, Optional
+from sqlalchemy import or_, update
+from src.core.config import get_settings
+from src.db.sql_db import SessionLocal, UserPaper
+
+logger = logging.getLogger(__name__)
+
+# Statuses a paper passes through while a worker owns it
+IN_PROGRESS_STATUSES = ("downloading", "parsing", "indexing")
+# Statuses from which a save or project add may queue the paper again;
+# anything else is queued, in progress or done
+REQUEUE_STATUSES = (None, "failed")
+WORKER_POLL_INTERVAL = 2.0
+
+_executor = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=get_settings().INGESTION_WORKERS,
+            thread_name_prefix="ingest"
+        )
+    return _executor
+
+
+def enqueue_ingestion(paper_id: str) -> Optional[Future]:
+    """
+    Schedule ingestion of a paper already marked "pending". In worker mode
+    the status row is the whole job, so nothing is submitted here.
+    """
+    if get_settings().INGESTION_MODE == "worker":
+        logger.info(f"Left {paper_id} pending for the ingestion worker")
+        return None
+    logger.info(f"Queued ingestion for {paper_id}")
+    return _get_executor().submit(ingest_paper, paper_id)
+
+
+def _claim(paper_id: str) -> bool:
+    """Atomically move a pending paper to "downloading"; False if someone else has it."""
+    with SessionLocal() as db:
+        result = db.execute(
+            update(UserPaper)
+            .where(UserPaper.paper_id == paper_id, UserPaper.ingestion_status == "pending")
+            .values(ingestion_status="downloading")
+        )
+        db.commit()
+        return result.rowcount == 1
+
+
+def _pending_paper_ids(limit: Optional[int] = None) -> List[str]:
+    with SessionLocal() as db:
+        query = (
+            db.query(UserPaper.paper_id)
+            .filter(
+                UserPaper.ingestion_status == "pending",
+                or_(UserPaper.is_saved.is_(True), UserPaper.projects.any())
+            )
+            .order_by(UserPaper.updated_at)
+        )
+        if limit:
+            query = query.limit(limit)
+        return [paper_id for (paper_id,) in query]
+
+
+def requeue_interrupted() -> int:
+    """
+    Mark papers left mid-ingestion by a stopped process as pending again.
+    Only safe when the caller is the sole ingester (the API in local mode,
+    or the single worker process at startup).
+    """
+    with SessionLocal() as db:
+        result = db.execute(
+            update(UserPaper)
+            .where(UserPaper.ingestion_status.in_(IN_PROGRESS_STATUSES))
+            .values(ingestion_status="pending")
+        )
+        db.commit()
+    if result.rowcount:
+        logger.info(f"Requeued {result.rowcount} interrupted ingestions")
+    return result.rowcount
+
+
+def resume_pending():
+    """Local mode startup: resubmit papers that were queued or interrupted before a restart."""
+    if get_settings().INGESTION_MODE == "worker":
+        return
+    requeue_interrupted()
+    for paper_id in _pending_paper_ids():
+        enqueue_ingestion(paper_id)
+
+
+def run_worker(poll_interval: float = WORKER_POLL_INTERVAL):
+    """
+    Ingest pending papers forever, INGESTION_WORKERS at a time. Run a single
+    worker process; Docling conversions still fan out to their own pool.
+    """
+    requeue_interrupted()
+    executor = _get_executor()
+    slots = threading.BoundedSemaphore(get_settings().INGESTION_WORKERS)
+    logger.info("Ingestion worker started")
+    while True:
+        slots.acquire()
+        claimed = next((p for p in _pending_paper_ids(limit=10) if _claim(p)), None)
+        if claimed is None:
+            slots.release()
+            time.sleep(poll_interval)
+            continue
+        future = executor.submit(_run_ingestion, claimed)
+        future.add_done_callback(lambda _: slots.release())
+
+
+def _update_status(paper_id: str, status: str, chunk_count: int = None, pdf_path: str = None, error_message: str = None):
+    """Helper to safely update paper status in new transaction"""
+    db = SessionLocal()
+    try:
+        paper = db.query(UserPaper).filter(UserPaper.paper_id == paper_id).first()
+        if paper:
+            paper.ingestion_status = status
+            if chunk_count is not None:
+                paper.chunk_count = chunk_count
+            if pdf_path:
+                paper.pdf_path = pdf_path
+            if error_message:
+                paper.error_message = error_message
+            
+            if status == "completed":
+                paper.ingested_at = datetime.datetime.utcnow()
+                
+            db.commit()
+            logger.info(f"Updated status for {paper_id} to {status}")
+        else:
+            logger.warning(f"Could not find paper {paper_id} to update status to {status}")
+    except Exception as e:
+        logger.error(f"Failed to update status for {paper_id}: {e}")
+    finally:
+        db.close()
+
+
+def ingest_paper(paper_id: str):
+    """Claim a pending paper and ingest it; skipped if another job owns it."""
+    if not _claim(paper_id):
+        logger.info(f"Paper {paper_id} is not pending (already ingested or in progress). Skipping.")
+        return
+    _run_ingestion(paper_id)
+
+
+def _evict_cached_chunks(paper_id: str):
+    """
+    Drop retrieval results cached from the paper's previous index. Only this
+    process's cache can be reached; other processes rely on its TTL.
+    """
+    # Not loaded means nothing was retrieved here (e.g. the worker process)
+    rag_tool = sys.modules.get("src.tools.rag_tool")
+    if rag_tool is not None:
+        rag_tool.PaperRAGTool.evict_paper(paper_id)
+
+
+def _run_ingestion(paper_id: str):
+    """
+    Ingestion job for a single, already claimed paper:
+    1. Download PDF from arXiv
+    2. Parse with Docling
+    3. Index with LlamaIndex into ChromaDB
+    """
+    logger.info(f"Starting PDF ingestion for: {paper_id}")
+
+    try:
+        # Step 1: Download PDF
+        from src.ingestion.pdf_downloader import PDFDownloader
+        downloader = PDFDownloader()
+        pdf_path = downloader.download(paper_id)
+        logger.info(f"Downloaded PDF: {pdf_path}")
+        
+        # Update status
+        _update_status(paper_id, "parsing", pdf_path=str(pdf_path))
+        
+        # Step 2: Parse with Docling
+        from src.ingestion.docling_parser import DoclingParser
+        parser = DoclingParser()
+        parsed_doc = parser.parse(pdf_path, paper_id)
+        logger.info(f"Parsed: {len(parsed_doc.sections)} sections.")
+        
+        # Update status
+        _update_status(paper_id, "indexing")
+        
+        # Step 3: Index with LlamaIndex
+        from src.ingestion.pipeline import PaperIngestionPipeline
+        pipeline = PaperIngestionPipeline()
+        chunk_count = pipeline.ingest(parsed_doc)
+        logger.info(f"Indexed {chunk_count} chunks for {paper_id}")
+        
+        # Update final status
+        _update_status(paper_id, "completed", chunk_count=chunk_count)
+        _evict_cached_chunks(paper_id)
+        
+        logger.info(f"Ingestion completed for {paper_id}")
+        
+    except Exception as e:
+        logger.error(f"Ingestion failed for {paper_id}: {e}")
+        _update_status(paper_id, "failed", error_message=str(e))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    run_worker()
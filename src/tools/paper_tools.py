@@ -26,9 +26,9 @@ class PaperTool(BaseTool):
         Execute the paper outline search.
         Returns paper outline.
         """
-        db = SessionLocal()
-        result = db.get(PaperStructure, paper_id)
-        if result:
-            return result.outline
-        else:
-            return "No outline found."
+        with SessionLocal() as db:
+            result = db.get(PaperStructure, paper_id)
+            if result:
+                return result.outline
+            else:
+                return "No outline found."
@@ -1,5 +1,11 @@
+import math
+import re
+import threading
+from functools import lru_cache
+import numpy as np
+from cachetools import LRUCache, TTLCache
 from crewai.tools import BaseTool
-from typing import Type
+from typing import ClassVar, List, Type
 from pydantic import BaseModel, Field
 from src.core.retriever import PaperRetriever
 
@@ -10,6 +16,63 @@ class PaperSearchInput(BaseModel):
                        relevant information from the paper.""")
 
 
+@lru_cache(maxsize=1)
+def _get_retriever() -> PaperRetriever:
+    """Process-wide retriever, so the vector store client is opened once."""
+    return PaperRetriever()
+
+
+# Chunks retrieved per search
+TOP_K = 5
+# Raw chunks outlive a run only briefly; a re-ingested paper's new chunks
+# replace them at the latest after this long
+CHUNK_CACHE_TTL = 600
+
+# Retrieved context longer than this is compressed before it reaches the LLM
+COMPRESS_MIN_CHARS = 1500
+COMPRESS_RATIO = 0.3
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9(\[])")
+_TERM_RE = re.compile(r"[a-z0-9]+")
+
+
+def _compress(chunks: List[dict], query: str, ratio: float = COMPRESS_RATIO) -> List[dict]:
+    """
+    Extractive compression: keep the top `ratio` of each chunk's sentences
+    by TF-IDF cosine similarity to the query, in their original order.
+    Metadata (section, figures) is left untouched so headers survive.
+    """
+    sentences = [_SENTENCE_RE.split(chunk['content'].strip()) for chunk in chunks]
+    docs = [_TERM_RE.findall(s.lower()) for sents in sentences for s in sents]
+    docs.append(_TERM_RE.findall(query.lower()))
+    vocab: dict = {}
+    for terms in docs:
+        for term in terms:
+            vocab.setdefault(term, len(vocab))
+    if not vocab:
+        return chunks
+
+    tf = np.zeros((len(docs), len(vocab)), dtype=np.float32)
+    for i, terms in enumerate(docs):
+        for term in terms:
+            tf[i, vocab[term]] += 1
+    # Smoothed IDF over the sentences only; the last row is the query
+    df = np.count_nonzero(tf[:-1], axis=0)
+    idf = np.log(len(docs) / (1 + df)) + 1
+    weights = tf * idf
+    weights /= np.linalg.norm(weights, axis=1, keepdims=True) + 1e-9
+    scores = weights[:-1] @ weights[-1]
+
+    compressed, offset = [], 0
+    for chunk, sents in zip(chunks, sentences):
+        chunk_scores = scores[offset:offset + len(sents)]
+        offset += len(sents)
+        keep = max(1, math.ceil(len(sents) * ratio))
+        top = sorted(np.argsort(-chunk_scores, kind="stable")[:keep])
+        compressed.append({**chunk, 'content': " ".join(sents[i] for i in top)})
+    return compressed
+
+
 class PaperRAGTool(BaseTool):
     """Tool to search a specific paper for relevant information."""
     name: str = "paper_search"
@@ -19,34 +82,128 @@ class PaperRAGTool(BaseTool):
 
     # Paper-specific config (set at runtime)
     paper_id: str = ""
+    # Skip compression, for agents that need the chunks verbatim (validator)
+    uncompressed: bool = False
+    # Crew run this tool belongs to; scopes search_cache entries to that run
+    run_id: str = ""
+
+    # (run_id, paper_id, normalized query) -> formatted result. Agents of one
+    # crew run often repeat a search (e.g. the validator re-checking a claim).
+    # Keyed by run so concurrent chats never see each other's entries; old
+    # runs simply age out of the LRU.
+    search_cache: ClassVar[LRUCache] = LRUCache(maxsize=256)
+    search_cache_lock: ClassVar[threading.Lock] = threading.Lock()
+    # (paper_id, normalized query) -> raw retrieved chunks, shared across
+    # runs: the chat endpoint retrieves a question's citations through
+    # retrieve() and the crew's search for it reuses them. Empty results
+    # are not kept, and evict_paper() drops a paper's entries on re-ingestion.
+    chunk_cache: ClassVar[TTLCache] = TTLCache(maxsize=256, ttl=CHUNK_CACHE_TTL)
 
     def __init__(self, paper_id: str, **kwargs):
         super().__init__(**kwargs)
         self.paper_id = paper_id
 
+    @classmethod
+    def evict_paper(cls, paper_id: str):
+        """Forget cached chunks of a paper whose index just changed."""
+        with cls.search_cache_lock:
+            for key in [key for key in cls.chunk_cache if key[0] == paper_id]:
+                cls.chunk_cache.pop(key, None)
+
+    @staticmethod
+    def _normalize(query: str) -> str:
+        return " ".join(query.lower().split())
+
+    def _cache_key(self, query: str):
+        return self.run_id, self.paper_id, self.uncompressed, self._normalize(query)
+
+    def _cached_chunks(self, query: str):
+        with self.search_cache_lock:
+            return self.chunk_cache.get((self.paper_id, self._normalize(query)))
+
+    def _remember_chunks(self, query: str, chunks: List[dict]):
+        # An empty result may just mean the paper isn't indexed yet
+        if not chunks:
+            return
+        with self.search_cache_lock:
+            self.chunk_cache[(self.paper_id, self._normalize(query))] = chunks
+
+    def retrieve(self, query: str) -> List[dict]:
+        """Raw top-k chunks for a query (shared, do not mutate)."""
+        chunks = self._cached_chunks(query)
+        if chunks is None:
+            chunks = _get_retriever().query(
+                query_text=query,
+                paper_id=self.paper_id,
+                top_k=TOP_K
+            )
+            self._remember_chunks(query, chunks)
+        return chunks
+
+    def _cached(self, query: str):
+        with self.search_cache_lock:
+            return self.search_cache.get(self._cache_key(query))
+
+    def _remember(self, query: str, result: str):
+        with self.search_cache_lock:
+            self.search_cache[self._cache_key(query)] = result
+
     def _run(self, query: str) -> str:
         """
         Execute the paper search.
         Returns formatted context chunks from the paper.
         """
-        retriever = PaperRetriever()
-        results = retriever.query(
-            query_text=query,
-            paper_id=self.paper_id,
-            top_k=5
-        )
+        cached = self._cached(query)
+        if cached is not None:
+            return cached
+        result = self._format(self._maybe_compress(self.retrieve(query), query))
+        self._remember(query, result)
+        return result
+
+    def run_batch(self, queries: List[str]) -> List[str]:
+        """
+        Search several queries with one embedding request.
+        Returns one formatted context string per query, in order.
+        """
+        results = [self._cached(query) for query in queries]
+        misses = [i for i, result in enumerate(results) if result is None]
+        chunks = {i: self._cached_chunks(queries[i]) for i in misses}
+        to_fetch = [i for i in misses if chunks[i] is None]
+        if to_fetch:
+            batch = _get_retriever().query_batch(
+                query_texts=[queries[i] for i in to_fetch],
+                paper_id=self.paper_id,
+                top_k=TOP_K
+            )
+            for i, fetched in zip(to_fetch, batch):
+                chunks[i] = fetched
+                self._remember_chunks(queries[i], fetched)
+        for i in misses:
+            results[i] = self._format(self._maybe_compress(chunks[i], queries[i]))
+            self._remember(queries[i], results[i])
+        return results
+
+    def _maybe_compress(self, results: List[dict], query: str) -> List[dict]:
+        if self.uncompressed:
+            return results
+        if sum(len(chunk['content']) for chunk in results) <= COMPRESS_MIN_CHARS:
+            return results
+        return _compress(results, query)
+
+    @staticmethod
+    def _format(results: List[dict]) -> str:
         if not results:
             return "No relevant information found in the paper for this query."
         # Format results as context
         context_parts = []
         for chunk in results:
-            paper_id = chunk['metadata'].get('paper_id', 'unknown').upper()
-            section_title = chunk['metadata'].get('section', '')
-            content = chunk['content']
-            figures = chunk['metadata'].get('figures', '')
-            header = f"[Paper: {paper_id}]"
+            metadata = chunk['metadata']
+            section_title = metadata.get('section', '')
+            header = f"[Paper: {metadata.get('paper_id', 'unknown').upper()}]"
             if section_title:
-                header += f"Section: {section_title}"
-            context_parts.append(f"""{header}:\n{content} \n
-                                  relevant figures: {figures}\n""")
+                header = f"{header}Section: {section_title}"
+            context_parts.append(
+                f"{header}:\n{chunk['content']} \n\n"
+                f"                                  relevant figures: {metadata.get('figures', '')}\n"
+            )
         return "\n\n---\n\n".join(context_parts)
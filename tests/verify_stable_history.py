@@ -0,0 +1,73 @@
+import sys
+import os
+import tempfile
+
+# Ensure src is in pythonpath
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.agents.paper_crew import PaperMemoryManager
+
+PAPER_ID = "2401.00001"
+
+
+def _summaries(memory, turns):
+    """Add `turns` conversations, returning the summary seen after each one"""
+    summaries = []
+    for i in range(turns):
+        memory.add_conversation(PAPER_ID, f"question {i}", f"answer {i} " + "detail " * 30)
+        summary, latest = memory.get_stable_history(PAPER_ID)
+        assert latest.startswith(f"Previous Q: question {i}\n")
+        summaries.append(summary)
+    return summaries
+
+
+def _lines(summary):
+    return summary.count("- Q:")
+
+
+def _check_prefix_stable(summaries):
+    """The summary only grows at its end, except when its oldest part is dropped"""
+    drops = 0
+    for previous, current in zip(summaries, summaries[1:]):
+        if current.startswith(previous):
+            continue
+        # A changed prefix must be a drop of old turns, never a one-turn shift
+        assert _lines(current) < _lines(previous), (previous, current)
+        drops += 1
+    return drops
+
+
+def test_summary_is_prefix_across_turns():
+    with tempfile.TemporaryDirectory() as tmp:
+        memory = PaperMemoryManager(memory_file=os.path.join(tmp, "conversations.jsonl"))
+        summaries = _summaries(memory, 40)
+        assert summaries[1].startswith("Earlier in this conversation:\n- Q: question 0 |")
+        assert _check_prefix_stable(summaries) < 40 // 2
+
+
+def test_summary_is_prefix_past_maxlen():
+    turns = PaperMemoryManager.MAX_CONVERSATIONS * 2 + 10
+    with tempfile.TemporaryDirectory() as tmp:
+        memory = PaperMemoryManager(memory_file=os.path.join(tmp, "conversations.jsonl"))
+        summaries = _summaries(memory, turns)
+        assert len(memory.conversations[PAPER_ID]) == PaperMemoryManager.MAX_CONVERSATIONS
+        past_maxlen = summaries[PaperMemoryManager.MAX_CONVERSATIONS:]
+        assert _check_prefix_stable(past_maxlen) < len(past_maxlen) // 2
+
+
+def test_digests_follow_evictions():
+    with tempfile.TemporaryDirectory() as tmp:
+        memory = PaperMemoryManager(memory_file=os.path.join(tmp, "conversations.jsonl"))
+        _summaries(memory, PaperMemoryManager.MAX_CONVERSATIONS + 5)
+        digests = memory._paper_digests(PAPER_ID)
+        conversations = memory.conversations[PAPER_ID]
+        assert len(digests) == len(conversations)
+        assert digests[0].startswith(f"- Q: {conversations[0]['query']} |")
+        assert digests[-1].startswith(f"- Q: {conversations[-1]['query']} |")
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"SUCCESS: {name}")
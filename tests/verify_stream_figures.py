@@ -0,0 +1,85 @@
+import re
+import sys
+import os
+from unittest.mock import patch, MagicMock
+
+# Ensure src is in pythonpath
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.agents import paper_crew
+from src.agents.paper_crew import _stream_with_figures
+
+_TAG_RE = re.compile(r"<figure:([^>]+)>")
+
+
+def _stream(deltas):
+    """Run _stream_with_figures with a fake injector; returns (chunks, injected inputs, session)"""
+    injected = []
+
+    def fake_inject(text, paper_id, session):
+        injected.append(text)
+        return _TAG_RE.sub(lambda m: f"[FIG {m.group(1)}]", text)
+
+    session = MagicMock()
+    with patch.object(paper_crew, 'SessionLocal', return_value=session), \
+         patch.object(paper_crew, 'inject_figures', side_effect=fake_inject):
+        chunks = list(_stream_with_figures(iter(deltas), "2401.00001"))
+    return chunks, injected, session
+
+
+def _splits_tag(text):
+    """Whether text ends inside a <figure:ID> tag (or a prefix of one)"""
+    cut = text.rfind("<")
+    if cut == -1:
+        return False
+    tail = text[cut:]
+    return ">" not in tail and (tail.startswith("<figure:") or "<figure:".startswith(tail))
+
+
+def test_tag_split_across_deltas():
+    chunks, injected, session = _stream(["See <fig", "ure:", "3", "> for details"])
+    assert "".join(chunks) == "See [FIG 3] for details"
+    assert any("<figure:3>" in text for text in injected)
+    assert not any(_splits_tag(text) for text in injected)
+    session.close.assert_called_once()
+
+
+def test_text_before_tag_is_not_held_back():
+    chunks, _, _ = _stream(["Results are strong ", "<figure:", "2a>", " overall"])
+    assert chunks[0] == "Results are strong "
+    assert "".join(chunks) == "Results are strong [FIG 2a] overall"
+
+
+def test_closed_tag_followed_by_open_prefix():
+    chunks, injected, _ = _stream(["<figure:1> and <fi", "gure:2> too"])
+    assert "".join(chunks) == "[FIG 1] and [FIG 2] too"
+    assert not any(_splits_tag(text) for text in injected)
+
+
+def test_unterminated_tag_is_flushed_at_end():
+    chunks, injected, session = _stream(["Shown in <figure:4"])
+    assert "".join(chunks) == "Shown in <figure:4"
+    assert injected == ["Shown in ", "<figure:4"]
+    session.close.assert_called_once()
+
+
+def test_plain_angle_bracket_is_not_held_back():
+    chunks, _, _ = _stream(["a < b", " and c"])
+    assert chunks == ["a < b", " and c"]
+
+
+def test_session_closed_when_consumer_stops_early():
+    session = MagicMock()
+    with patch.object(paper_crew, 'SessionLocal', return_value=session), \
+         patch.object(paper_crew, 'inject_figures', side_effect=lambda text, *_: text):
+        stream = _stream_with_figures(iter(["first ", "second"]), "2401.00001")
+        assert next(stream) == "first "
+        stream.close()
+    session.close.assert_called_once()
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"SUCCESS: {name}")